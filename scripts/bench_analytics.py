@@ -0,0 +1,88 @@
+"""Benchmark the analytics module with and without NumPy.
+
+Fills a UsageColumns store with a week of synthetic heavy-user records,
+runs each analytics query through the pure-Python and the NumPy path,
+checks that both give identical results, and reports the timings.
+
+Usage:
+    python scripts/bench_analytics.py [--records 300000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from claude_token_monitor.monitor import analytics  # noqa: E402
+from claude_token_monitor.monitor.columnar import UsageColumns  # noqa: E402
+
+WEEK = 7 * 24 * 3600
+
+
+def build_columns(n_records: int, seed: int = 0) -> tuple[UsageColumns, float]:
+    """A week of records across a few dozen projects and two models."""
+    rng = random.Random(seed)
+    start = time.time() - WEEK
+    columns = UsageColumns()
+    for i in range(n_records):
+        project = f"-home-dev-project{int(rng.paretovariate(1.2)) % 40}"
+        columns.append(
+            start + i * WEEK / n_records,
+            project,
+            f"session-{i // 400}",
+            "claude-opus-4-1" if rng.random() < 0.3 else "claude-sonnet-4-5",
+            rng.randint(1, 60),
+            rng.randint(20, 4000),
+            rng.choice((0, 0, 0, rng.randint(500, 20000))),
+            rng.randint(0, 150_000),
+        )
+    return columns, start
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not analytics.HAS_NUMPY:
+        sys.exit("NumPy is not installed; nothing to compare against")
+
+    columns, start = build_columns(args.records)
+    queries = {
+        "hourly_tokens": lambda use_numpy: analytics.hourly_tokens(
+            columns, start, start + WEEK, use_numpy=use_numpy
+        ),
+        "request_percentiles": lambda use_numpy: analytics.request_percentiles(
+            columns, (50, 90, 99), use_numpy=use_numpy
+        ),
+        "cache_hit_ratios": lambda use_numpy: analytics.cache_hit_ratios(
+            columns, use_numpy=use_numpy
+        ),
+    }
+
+    print(f"records: {len(columns):,} over 7 days, {columns.nbytes / 1e6:.1f} MB of columns")
+    for name, query in queries.items():
+        assert query(False) == query(True), f"{name}: results differ"
+        python = timed(lambda: query(False), args.repeat)
+        vectorized = timed(lambda: query(True), args.repeat)
+        print(
+            f"{name:<20} python {python * 1000:8.1f} ms   numpy {vectorized * 1000:7.1f} ms"
+            f"   speedup {python / vectorized:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark JSONL usage parsing on a synthetic Claude Code transcript.
+
+Compares the original line-by-line parse (decode + json.loads on every
+line) with LogMonitor's byte pre-filter path, and reports lines/second.
+
+Usage:
+    python scripts/bench_log_parse.py [--lines 200000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from claude_token_monitor.monitor import log_monitor  # noqa: E402
+from claude_token_monitor.monitor.log_monitor import LogMonitor, _FileCheckpoint  # noqa: E402
+
+
+def write_corpus(path: str, n_lines: int, seed: int = 0) -> int:
+    """Write a transcript where roughly one line in five carries usage."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(hours=4)
+    usage_lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n_lines):
+            ts = (start + timedelta(seconds=i * 0.05)).isoformat().replace("+00:00", "Z")
+            kind = rng.random()
+            if kind < 0.2:
+                usage_lines += 1
+                entry = {
+                    "type": "assistant",
+                    "sessionId": "bench-session",
+                    "timestamp": ts,
+                    "requestId": f"req_{i}",
+                    "message": {
+                        "id": f"msg_{i}",
+                        "model": "claude-sonnet-4-5",
+                        "role": "assistant",
+                        "content": [{"type": "text", "text": "ok " * rng.randint(5, 80)}],
+                        "usage": {
+                            "input_tokens": rng.randint(1, 50),
+                            "output_tokens": rng.randint(1, 2000),
+                            "cache_creation_input_tokens": rng.randint(0, 5000),
+                            "cache_read_input_tokens": rng.randint(0, 90000),
+                        },
+                    },
+                }
+            elif kind < 0.6:
+                # Tool result carrying file contents
+                entry = {
+                    "type": "user",
+                    "sessionId": "bench-session",
+                    "timestamp": ts,
+                    "message": {
+                        "role": "user",
+                        "content": [{
+                            "type": "tool_result",
+                            "content": "def f(x):\n    return x\n" * rng.randint(10, 400),
+                        }],
+                    },
+                }
+            else:
+                entry = {
+                    "type": "user",
+                    "sessionId": "bench-session",
+                    "timestamp": ts,
+                    "message": {"role": "user", "content": "please " * rng.randint(3, 60)},
+                }
+            f.write(json.dumps(entry) + "\n")
+    return usage_lines
+
+
+def parse_baseline(path: str) -> int:
+    """The original approach: decode and json.loads every line."""
+    found = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            usage = entry.get("usage")
+            message = entry.get("message")
+            if not usage and isinstance(message, dict):
+                usage = message.get("usage")
+            if isinstance(usage, dict):
+                found += 1
+    return found
+
+
+def parse_current(monitor: LogMonitor, path: str) -> int:
+    """LogMonitor's streaming parse with the byte pre-filter."""
+    st = os.stat(path)
+    cp = _FileCheckpoint(None, st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+    cutoff = datetime.fromtimestamp(0, tz=timezone.utc)
+    return sum(1 for _ in monitor._iter_usage_rows(path, cp, cutoff, "bench", "bench"))
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.jsonl")
+        usage_lines = write_corpus(path, args.lines)
+        size_mb = os.path.getsize(path) / 1e6
+        monitor = LogMonitor(index_path=":memory:")
+
+        assert parse_baseline(path) == usage_lines
+        assert parse_current(monitor, path) == usage_lines
+
+        before = timed(lambda: parse_baseline(path), args.repeat)
+        after = timed(lambda: parse_current(monitor, path), args.repeat)
+
+    print(f"corpus: {args.lines:,} lines, {usage_lines:,} with usage, {size_mb:.1f} MB")
+    print(f"json backend: {log_monitor.JSON_BACKEND}")
+    print(f"before: {args.lines / before:>12,.0f} lines/s  ({before:.3f}s)")
+    print(f"after:  {args.lines / after:>12,.0f} lines/s  ({after:.3f}s)")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
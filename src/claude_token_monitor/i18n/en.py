@@ -26,6 +26,10 @@ STRINGS = {
     "cache_create_label": "Cache Created",
     "cache_read_label": "Cache Read",
     "requests_sessions_format": "{req_count} Requests / {sess_count} Sessions",
+    "local_weekly_format": "{tokens} local (7d)",
+    "models_label": "Models",
+    "top_projects_header": "Top Projects (5h)",
+    "model_usage_format": "{model}: {weekly} (7d) / {session} (5h)",
     "token_label": "Tokens",
     "cache_label": "Cache",
 
@@ -35,6 +39,7 @@ STRINGS = {
     "subscription_label": "Subscription",
     "subscription_format": "{type} ({tier})",
     "last_updated": "Last Updated",
+    "stale_label": "stale",
     "error_label": "Error",
     "error_format": "Error: {msg}",
     "loading": "Loading...",
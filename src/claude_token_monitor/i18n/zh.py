@@ -26,6 +26,10 @@ STRINGS = {
     "cache_create_label": "缓存创建",
     "cache_read_label": "缓存读取",
     "requests_sessions_format": "请求 {req_count} 次 / {sess_count} 个会话",
+    "local_weekly_format": "本地 7 天 {tokens}",
+    "models_label": "模型",
+    "top_projects_header": "项目排行（5 小时）",
+    "model_usage_format": "{model}：7 天 {weekly} / 5 小时 {session}",
     "token_label": "令牌",
     "cache_label": "缓存",
 
@@ -35,6 +39,7 @@ STRINGS = {
     "subscription_label": "订阅",
     "subscription_format": "{type} ({tier})",
     "last_updated": "上次更新",
+    "stale_label": "旧数据",
     "error_label": "错误",
     "error_format": "错误: {msg}",
     "loading": "加载中...",
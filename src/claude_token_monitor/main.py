@@ -3,21 +3,32 @@
 Architecture:
   - tkinter on main thread (hidden root window)
   - pystray in daemon thread
-  - Data refresh every 60s via root.after(), first fetch at 2s
+  - Data refresh via root.after(), first fetch at 2s; the interval adapts
+    to session usage and local activity (20s to 10min, 60s by default)
+  - Each source's figures are shown as soon as it returns
+  - Local stats refreshed shortly after a log file changes (when watched)
+  - One refresh worker thread: at most one refresh running, one queued
   - Thread-safe UI updates via root.after(0, callback)
+  - The last result is shown (stale) at startup until the first fetch
 """
 
 import sys
+import multiprocessing
 import threading
 import tkinter as tk
+from dataclasses import replace
 
 from claude_token_monitor import i18n
 from claude_token_monitor.monitor.combined import CombinedMonitor
+from claude_token_monitor.monitor.snapshot import UsageSnapshot
 from claude_token_monitor.ui.tray import TrayIcon
 from claude_token_monitor.ui.detail_window import DetailWindow
 
-REFRESH_INTERVAL_MS = 60_000  # 60 seconds
+REFRESH_INTERVAL_MS = 60_000  # 60 seconds, while active at low usage
+MIN_REFRESH_INTERVAL_MS = 20_000  # Close to the session limit
+MAX_REFRESH_INTERVAL_MS = 600_000  # After a long idle spell
 FIRST_FETCH_DELAY_MS = 2_000  # 2 seconds
+LOCAL_REFRESH_DELAY_MS = 500  # Coalesces bursts of log writes
 
 
 class App:
@@ -27,6 +38,8 @@ class App:
         i18n.init()
 
         self._monitor = CombinedMonitor()
+        # The snapshot currently shown
+        self._data: UsageSnapshot | None = None
 
         # Hidden root window (tkinter must run on main thread)
         self._root = tk.Tk()
@@ -42,8 +55,28 @@ class App:
             on_quit=lambda *_: self._root.after(0, self._quit),
         )
 
+        # One worker runs refreshes; requests made while it is busy
+        # coalesce into a single queued one ("full" or "local")
+        self._refresh_cond = threading.Condition()
+        self._refresh_queued: str | None = None
+        self._stopping = False
+        self._refresh_timer: str | None = None
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+        # Refresh local stats as soon as Claude Code writes to its logs
+        self._local_refresh_pending = False
+        self._monitor.start_watching(
+            on_change=lambda: self._root.after(0, self._schedule_local_refresh)
+        )
+
+        # Show the last run's figures right away, marked stale, until
+        # the first fetch replaces them
+        snapshot = self._monitor.load_snapshot()
+        if snapshot is not None:
+            self._update_ui(snapshot, final=False)
+
         # Schedule first data fetch
-        self._root.after(FIRST_FETCH_DELAY_MS, self._do_refresh)
+        self._schedule_refresh(FIRST_FETCH_DELAY_MS)
 
     def run(self):
         """Start the application."""
@@ -54,23 +87,81 @@ class App:
         # Run tkinter main loop (blocks until quit)
         self._root.mainloop()
 
+    def _schedule_refresh(self, delay_ms):
+        """(Re)start the refresh timer; only one is ever pending."""
+        if self._refresh_timer is not None:
+            self._root.after_cancel(self._refresh_timer)
+        self._refresh_timer = self._root.after(delay_ms, self._do_refresh)
+
     def _do_refresh(self):
-        """Fetch data in a background thread, then update UI on main thread."""
-        thread = threading.Thread(target=self._fetch_and_update, daemon=True)
-        thread.start()
+        """Queue a full refresh; the worker updates the UI when it is done."""
+        if self._refresh_timer is not None:
+            self._root.after_cancel(self._refresh_timer)
+            self._refresh_timer = None
+        self._request_refresh("full")
+
+    def _request_refresh(self, kind):
+        """Queue a refresh, merging it with one already queued.
+
+        A full refresh also recomputes local stats, so it replaces a
+        queued local one.
+        """
+        with self._refresh_cond:
+            if kind == "full" or self._refresh_queued is None:
+                self._refresh_queued = kind
+            self._refresh_cond.notify()
+
+    def _refresh_loop(self):
+        """Worker thread: run queued refreshes one at a time."""
+        while True:
+            with self._refresh_cond:
+                while self._refresh_queued is None and not self._stopping:
+                    self._refresh_cond.wait()
+                if self._stopping:
+                    return
+                kind, self._refresh_queued = self._refresh_queued, None
+            if kind == "full":
+                self._fetch_and_update()
+            else:
+                self._fetch_local_and_update()
 
     def _fetch_and_update(self):
-        """Run in background thread: fetch data, then schedule UI update."""
+        """Run on the worker: fetch data, then schedule UI update."""
         try:
-            data = self._monitor.refresh()
+            data = self._monitor.refresh(
+                on_partial=lambda part: self._root.after(
+                    0, self._update_ui, part, False
+                )
+            )
         except Exception as e:
-            data = {"error": str(e), "session_pct": 0}
+            data = replace(self._data or UsageSnapshot(), error=str(e))
 
         # Schedule UI update on main thread
         self._root.after(0, self._update_ui, data)
 
-    def _update_ui(self, data):
-        """Update both tray and detail window (must run on main thread)."""
+    def _schedule_local_refresh(self):
+        """Coalesce log change events into one local refresh."""
+        if self._local_refresh_pending:
+            return
+        self._local_refresh_pending = True
+        self._root.after(LOCAL_REFRESH_DELAY_MS, self._do_local_refresh)
+
+    def _do_local_refresh(self):
+        """Queue a recompute of local stats."""
+        self._local_refresh_pending = False
+        self._request_refresh("local")
+
+    def _fetch_local_and_update(self):
+        """Run on the worker: refresh local stats, then update UI."""
+        try:
+            data = self._monitor.refresh_local()
+        except Exception:
+            return
+        if data is not None:
+            self._root.after(0, self._update_ui, data, False)
+
+    def _apply_data(self, data):
+        """Push data to the tray and detail window (must run on main thread)."""
         try:
             self._tray.update_data(data)
         except Exception:
@@ -81,11 +172,31 @@ class App:
         except Exception:
             pass
 
-        # Schedule next refresh
-        self._root.after(REFRESH_INTERVAL_MS, self._do_refresh)
+    def _update_ui(self, data, final=True):
+        """Update both tray and detail window (must run on main thread).
+
+        Snapshots equal to the one shown are skipped. A final update
+        ends a refresh and schedules the next one.
+        """
+        if data != self._data:
+            self._data = data
+            self._apply_data(data)
+
+        if final:
+            # Schedule next refresh
+            seconds = self._monitor.next_refresh_seconds(
+                REFRESH_INTERVAL_MS / 1000,
+                MIN_REFRESH_INTERVAL_MS / 1000,
+                MAX_REFRESH_INTERVAL_MS / 1000,
+            )
+            self._schedule_refresh(int(seconds * 1000))
 
     def _quit(self):
         """Clean shutdown."""
+        with self._refresh_cond:
+            self._stopping = True
+            self._refresh_cond.notify()
+        self._monitor.close()
         self._tray.stop()
         self._root.quit()
         self._root.destroy()
@@ -93,6 +204,8 @@ class App:
 
 def main():
     """Application entry point."""
+    # Cold-start log parsing uses a process pool; needed in frozen builds
+    multiprocessing.freeze_support()
     app = App()
     app.run()
 
@@ -0,0 +1,153 @@
+"""Usage analytics over a UsageColumns store.
+
+Uses NumPy when it is installed and plain Python otherwise. Both paths
+return identical results: NumPy only does the bulk work (sorting and
+binned sums, which stay exact for token counts below 2**53), and the
+arithmetic on the results happens in Python either way.
+"""
+
+import math
+from typing import Iterable
+
+from claude_token_monitor.monitor.columnar import UsageColumns
+
+# Optional: vectorized implementations
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+
+def _want_numpy(use_numpy: bool | None) -> bool:
+    if use_numpy is None:
+        return HAS_NUMPY
+    if use_numpy and not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+    return use_numpy
+
+
+def _lerp_percentile(ordered, count: int, pct: float) -> float:
+    """Linear-interpolation percentile of an ascending sequence."""
+    pos = (count - 1) * pct / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, count - 1)
+    low, high = float(ordered[lo]), float(ordered[hi])
+    return low + (high - low) * (pos - lo)
+
+
+def hourly_tokens(
+    columns: UsageColumns,
+    start: float,
+    end: float,
+    bucket_seconds: int = 3600,
+    use_numpy: bool | None = None,
+) -> list[int]:
+    """Billable tokens per time bucket between start and end.
+
+    Args:
+        columns: Records to summarize.
+        start: Epoch seconds where the first bucket starts.
+        end: Epoch seconds where the histogram stops.
+        bucket_seconds: Bucket width (default one hour).
+        use_numpy: Force (True) or avoid (False) NumPy; default auto.
+
+    Returns:
+        One total per bucket, oldest first, counting input, cache
+        creation and output tokens.
+    """
+    span = columns.span(start, end)
+    count = max(0, math.ceil((end - start) / bucket_seconds))
+    ts = columns.column("ts", span)
+    inp = columns.column("input_tokens", span)
+    cc = columns.column("cache_creation_input_tokens", span)
+    out = columns.column("output_tokens", span)
+    first = math.ceil(start)
+
+    if _want_numpy(use_numpy):
+        bins = (np.asarray(ts) - first) // bucket_seconds
+        billable = np.asarray(inp) + np.asarray(cc) + np.asarray(out)
+        sums = np.bincount(bins, weights=billable, minlength=count)
+        return sums.astype(np.int64).tolist()
+
+    sums = [0] * count
+    for t, i, c, o in zip(ts, inp, cc, out):
+        sums[(t - first) // bucket_seconds] += i + c + o
+    return sums
+
+
+def request_percentiles(
+    columns: UsageColumns,
+    percentiles: Iterable[float] = (50, 90, 99),
+    start: float | None = None,
+    end: float | None = None,
+    use_numpy: bool | None = None,
+) -> dict[float, float]:
+    """Percentiles of billable tokens per request.
+
+    Each row is one sample. LogMonitor indexes one row per record; a
+    row standing for a batch counts as one sample of its mean size.
+
+    Returns:
+        {percentile: tokens}, interpolating linearly between samples;
+        empty if the range holds no records.
+    """
+    span = columns.span(start, end)
+    inp = columns.column("input_tokens", span)
+    cc = columns.column("cache_creation_input_tokens", span)
+    out = columns.column("output_tokens", span)
+    records = columns.column("records", span)
+    count = len(records)
+    if not count:
+        return {}
+
+    if _want_numpy(use_numpy):
+        billable = np.asarray(inp) + np.asarray(cc) + np.asarray(out)
+        ordered = np.sort(billable / np.asarray(records))
+    else:
+        ordered = sorted((i + c + o) / r for i, c, o, r in zip(inp, cc, out, records))
+    return {pct: _lerp_percentile(ordered, count, pct) for pct in percentiles}
+
+
+def cache_hit_ratios(
+    columns: UsageColumns,
+    start: float | None = None,
+    end: float | None = None,
+    use_numpy: bool | None = None,
+) -> dict[str, float]:
+    """Share of each project's input tokens that were served from cache.
+
+    Returns:
+        {project: cache_read / (input + cache_creation + cache_read)} for
+        every project with input in the range.
+    """
+    span = columns.span(start, end)
+    codes = columns.column("project", span)
+    inp = columns.column("input_tokens", span)
+    cc = columns.column("cache_creation_input_tokens", span)
+    cr = columns.column("cache_read_input_tokens", span)
+    names = columns.names("project")
+
+    if _want_numpy(use_numpy):
+        codes_np = np.asarray(codes)
+        read = np.bincount(codes_np, weights=np.asarray(cr), minlength=len(names))
+        total = np.bincount(
+            codes_np,
+            weights=np.asarray(inp) + np.asarray(cc) + np.asarray(cr),
+            minlength=len(names),
+        )
+        read_sums = read.astype(np.int64).tolist()
+        total_sums = total.astype(np.int64).tolist()
+    else:
+        read_sums = [0] * len(names)
+        total_sums = [0] * len(names)
+        for code, i, c, r in zip(codes, inp, cc, cr):
+            read_sums[code] += r
+            total_sums[code] += i + c + r
+    return {
+        names[code]: read_sums[code] / total
+        for code, total in enumerate(total_sums)
+        if total
+    }
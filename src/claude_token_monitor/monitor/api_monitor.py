@@ -28,6 +28,23 @@ def format_tokens(n: int) -> str:
     return f"{n / 1_000_000:.1f}M"
 
 
+def format_model_name(model: str) -> str:
+    """Shorten a model id for display: claude-sonnet-4-5-20250929 -> sonnet-4-5."""
+    name = model.removeprefix("claude-")
+    head, _, tail = name.rpartition("-")
+    if head and len(tail) == 8 and tail.isdigit():
+        name = head
+    return name or "?"
+
+
+def format_project_name(name: str, width: int = 28) -> str:
+    """Shorten a project directory name (an encoded path) from the left."""
+    name = name.lstrip("-") or "?"
+    if len(name) <= width:
+        return name
+    return "\u2026" + name[-(width - 1):]
+
+
 def make_bar(pct: float, width: int = 15) -> str:
     """Create a Unicode progress bar string.
 
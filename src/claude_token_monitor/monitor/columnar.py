@@ -0,0 +1,138 @@
+"""Compact column-oriented in-memory store of usage records."""
+
+import math
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+# Integer columns, in the order rows are given to append()
+COLUMNS = (
+    "ts",
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "records",
+)
+# String columns, stored as small integer codes
+DIMENSIONS = ("project", "session", "model")
+
+
+class _Codes:
+    """Maps strings to dense integer codes and back."""
+
+    __slots__ = ("names", "codes")
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class UsageColumns:
+    """Usage records held as typed arrays, one per field.
+
+    Epoch seconds and token counters are 8-byte integers in array('q')
+    columns; project, session and model are 4-byte codes into small
+    name tables. A record costs about 60 bytes, against several hundred
+    for a dict, and each column can be handed to array code as a
+    buffer without copying.
+
+    Records are kept sorted by timestamp, so a time range maps to one
+    contiguous slice of every column.
+    """
+
+    def __init__(self):
+        self._columns = {name: array("q") for name in COLUMNS}
+        self._dims = {name: array("i") for name in DIMENSIONS}
+        self._codes = {name: _Codes() for name in DIMENSIONS}
+        self._sorted = True
+
+    def __len__(self) -> int:
+        return len(self._columns["ts"])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (not counting the name tables)."""
+        return sum(
+            len(a) * a.itemsize
+            for a in (*self._columns.values(), *self._dims.values())
+        )
+
+    def append(
+        self,
+        ts: float,
+        project: str,
+        session: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_creation: int,
+        cache_read: int,
+        records: int = 1,
+    ) -> None:
+        """Add one record (or a pre-summed batch of records)."""
+        ts_column = self._columns["ts"]
+        ts = int(ts)
+        if ts_column and ts < ts_column[-1]:
+            self._sorted = False
+        ts_column.append(ts)
+        for name, value in zip(
+            COLUMNS[1:],
+            (input_tokens, output_tokens, cache_creation, cache_read, records),
+        ):
+            self._columns[name].append(value)
+        for name, value in zip(DIMENSIONS, (project, session, model)):
+            self._dims[name].append(self._codes[name].encode(value))
+
+    def extend(self, rows: Iterable[tuple]) -> None:
+        """Add rows laid out like append()'s arguments."""
+        for row in rows:
+            self.append(*row[:9])
+
+    def _sort(self) -> None:
+        ts = self._columns["ts"]
+        order = sorted(range(len(ts)), key=ts.__getitem__)
+        for columns in (self._columns, self._dims):
+            for name, values in columns.items():
+                columns[name] = array(values.typecode, (values[i] for i in order))
+        self._sorted = True
+
+    def span(self, start: float | None = None, end: float | None = None) -> slice:
+        """Return the slice of records with start <= ts < end."""
+        if not self._sorted:
+            self._sort()
+        ts = self._columns["ts"]
+        lo = 0 if start is None else bisect_left(ts, math.ceil(start))
+        hi = len(ts) if end is None else bisect_left(ts, math.ceil(end))
+        return slice(lo, max(lo, hi))
+
+    def column(self, name: str, span: slice = slice(None)) -> memoryview:
+        """Return a zero-copy view of a column (or its codes) over a slice.
+
+        The column cannot grow while a view of it is alive; release views
+        (or let them go out of scope) before appending more records.
+        """
+        if not self._sorted:
+            self._sort()
+        values = self._columns.get(name)
+        if values is None:
+            values = self._dims[name]
+        return memoryview(values)[span]
+
+    def names(self, dimension: str) -> list[str]:
+        """Return the name table of a dimension; codes index into it."""
+        return self._codes[dimension].names
+
+    def totals(
+        self, start: float | None = None, end: float | None = None
+    ) -> list[int]:
+        """Sum (input, output, cache_creation, cache_read, records) over a range."""
+        span = self.span(start, end)
+        return [sum(self._columns[name][span]) for name in COLUMNS[1:]]
@@ -1,22 +1,88 @@
 """Combined monitoring: web API (primary) + local logs (supplementary)."""
 
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import replace
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable
 
 from claude_token_monitor.monitor.auth import get_auth_manager, AuthManager
 from claude_token_monitor.monitor.web_monitor import WebMonitor, WebMonitorError
 from claude_token_monitor.monitor.log_monitor import LogMonitor
+from claude_token_monitor.monitor.snapshot import (
+    LocalStats,
+    ModelUsage,
+    ProjectUsage,
+    UsageSnapshot,
+    WindowUsage,
+)
 from claude_token_monitor.platform.auth import CredentialError
+from claude_token_monitor.platform.paths import monitor_cache_dir
+
+
+def _run_in_daemon(fn: Callable[[], Any], name: str) -> Future:
+    """Run fn on a new daemon thread and return a future for its result.
+
+    A daemon thread does not hold up interpreter exit, so quitting does
+    not wait for a hung web request or a long first-run log parse.
+    """
+    future: Future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run() -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
 
 
 class CombinedMonitor:
     """Fetches real usage data from claude.ai, supplemented by local logs."""
 
-    def __init__(self):
+    # Local windows computed on every refresh: the session window, and the
+    # 7-day window shown next to the weekly limits
+    SESSION_WINDOW_HOURS = LogMonitor.DEFAULT_WINDOW_HOURS
+    WEEKLY_WINDOW_HOURS = 7 * 24.0
+
+    # Seconds refresh() waits for each source before reporting it stale.
+    # The web request itself times out after 15 s.
+    SOURCE_DEADLINES = {"web": 20.0, "local": 30.0, "credentials": 5.0}
+    SOURCE_LABELS = {"web": "Web", "local": "Logs", "credentials": "Credentials"}
+
+    # Local activity is measured over this many trailing minutes
+    ACTIVITY_MINUTES = 10
+
+    # The last result is kept on disk so the next start can show it at once
+    SNAPSHOT_FILENAME = "snapshot.json"
+    SNAPSHOT_VERSION = 1
+    DATETIME_FIELDS = (
+        "session_resets_at", "weekly_resets_at", "sonnet_resets_at", "last_updated"
+    )
+
+    def __init__(self, snapshot_path: str | None = None):
         self._web_monitor = WebMonitor()
         self._log_monitor = LogMonitor()
         self._auth_manager: AuthManager | None = None
-        self._last_result: dict[str, Any] | None = None
+        self._last_result: UsageSnapshot | None = None
+        self._snapshot_path = snapshot_path or os.path.join(
+            monitor_cache_dir(), self.SNAPSHOT_FILENAME
+        )
+
+        # Sources run side by side, each on its own daemon thread; a fetch
+        # that overran its deadline keeps running and is waited on again
+        # by the next refresh
+        self._in_flight: dict[str, Future] = {}
+        self._source_values: dict[str, dict[str, Any]] = {}
+
+        # Inputs to next_refresh_seconds()
+        self._previous_session_pct = 0
+        self._idle_refreshes = 0
 
         # Gracefully handle missing credentials
         try:
@@ -24,31 +90,43 @@ class CombinedMonitor:
         except Exception:
             pass
 
-    def refresh(self) -> dict[str, Any]:
-        """Fetch fresh data from claude.ai API and local logs.
+    @staticmethod
+    def _web_values(web_data: dict[str, Any]) -> dict[str, Any]:
+        """Map a claude.ai usage reply onto UsageSnapshot fields."""
+        return {
+            # Real usage from claude.ai (percentages)
+            "session": WindowUsage(
+                web_data.get("session_pct", 0), web_data.get("session_resets_at")
+            ),
+            "weekly": WindowUsage(
+                web_data.get("weekly_pct", 0), web_data.get("weekly_resets_at")
+            ),
+            "sonnet": WindowUsage(
+                web_data.get("sonnet_pct", 0), web_data.get("sonnet_resets_at")
+            ),
+            # Extra usage (if available)
+            "extra_spent": web_data.get("extra_spent"),
+            "extra_limit": web_data.get("extra_limit"),
+            "extra_pct": web_data.get("extra_pct"),
+        }
 
-        Returns:
-            Unified dict with all monitoring data.
-        """
-        error_parts: list[str] = []
+    # Each _*_fields() fetch returns None when it fails, after adding
+    # the reason to error_parts; the source then keeps its last values
 
-        # --- Primary: real usage from claude.ai API ---
-        web_data: dict[str, Any] = {}
+    def _web_fields(self, error_parts: list[str]) -> dict[str, Any] | None:
+        """Fetch real usage from the claude.ai API."""
         try:
             web_data = self._web_monitor.get_usage()
         except WebMonitorError as e:
             error_parts.append(f"Web: {e}")
+            return None
         except Exception as e:
             error_parts.append(f"Web: {e}")
+            return None
+        return self._web_values(web_data)
 
-        # --- Supplementary: local log data ---
-        local_data: dict[str, Any] = {}
-        try:
-            local_data = self._log_monitor.get_usage()
-        except Exception as e:
-            error_parts.append(f"Logs: {e}")
-
-        # --- Subscription info from credential store ---
+    def _credential_fields(self, error_parts: list[str]) -> dict[str, Any] | None:
+        """Read subscription info from the credential store."""
         subscription_type = ""
         rate_tier = ""
         if self._auth_manager:
@@ -57,37 +135,323 @@ class CombinedMonitor:
                 rate_tier = self._auth_manager.rate_limit_tier
             except (CredentialError, Exception) as e:
                 error_parts.append(f"Credentials: {e}")
+                return None
+        return {"subscription_type": subscription_type, "rate_tier": rate_tier}
 
-        result = {
-            # Real usage from claude.ai (percentages)
-            "session_pct": web_data.get("session_pct", 0),
-            "session_resets_at": web_data.get("session_resets_at"),
-            "weekly_pct": web_data.get("weekly_pct", 0),
-            "weekly_resets_at": web_data.get("weekly_resets_at"),
-            "sonnet_pct": web_data.get("sonnet_pct", 0),
-            "sonnet_resets_at": web_data.get("sonnet_resets_at"),
-            # Extra usage (if available)
-            "extra_spent": web_data.get("extra_spent"),
-            "extra_limit": web_data.get("extra_limit"),
-            "extra_pct": web_data.get("extra_pct"),
-            # Local log data (supplementary detail)
-            "input_tokens": local_data.get("input_tokens", 0),
-            "output_tokens": local_data.get("output_tokens", 0),
-            "cache_creation": local_data.get("cache_creation_input_tokens", 0),
-            "cache_read": local_data.get("cache_read_input_tokens", 0),
-            "record_count": local_data.get("record_count", 0),
-            "session_count": local_data.get("session_count", 0),
-            # Subscription
-            "subscription_type": subscription_type,
-            "rate_tier": rate_tier,
-            # Metadata
-            "error": "; ".join(error_parts) if error_parts else None,
-            "last_updated": datetime.now(tz=timezone.utc),
+    def _local_fields(self, error_parts: list[str]) -> dict[str, Any] | None:
+        """Read the session and weekly local windows in one pass."""
+        try:
+            windows = self._log_monitor.get_usage_windows(
+                (self.SESSION_WINDOW_HOURS, self.WEEKLY_WINDOW_HOURS)
+            )
+            local_data = windows[self.SESSION_WINDOW_HOURS]
+            weekly_data = windows[self.WEEKLY_WINDOW_HOURS]
+            activity_rate = self._log_monitor.get_activity_rate(
+                self.ACTIVITY_MINUTES
+            )
+        except Exception as e:
+            error_parts.append(f"Logs: {e}")
+            return None
+        return self._local_values(local_data, weekly_data, activity_rate)
+
+    @staticmethod
+    def _local_values(
+        local_data: dict[str, Any],
+        weekly_data: dict[str, Any],
+        activity_rate: float = 0.0,
+    ) -> dict[str, Any]:
+        """Map the session and weekly local windows onto UsageSnapshot fields."""
+        # Per-model billable tokens, largest weekly user first
+        session_models = local_data.get("models", {})
+        weekly_models = weekly_data.get("models", {})
+        models = tuple(
+            ModelUsage(
+                name,
+                session_models.get(name, {}).get("billable_total", 0),
+                m["billable_total"],
+                m["record_count"],
+            )
+            for name, m in sorted(
+                weekly_models.items(),
+                key=lambda item: item[1]["billable_total"],
+                reverse=True,
+            )
+        )
+
+        # Sonnet-only tokens, to sit next to the Sonnet weekly limit
+        sonnet_weekly_tokens = sum(
+            m.weekly_tokens for m in models if "sonnet" in m.name.lower()
+        )
+
+        # Most expensive projects in the session window
+        projects = tuple(
+            ProjectUsage(
+                p["project"],
+                p["billable_total"],
+                p["record_count"],
+                p["input_tokens"],
+                p["output_tokens"],
+                p["cache_creation_input_tokens"],
+                p["cache_read_input_tokens"],
+            )
+            for p in local_data.get("projects", [])
+        )
+
+        return {
+            "local": LocalStats(
+                input_tokens=local_data.get("input_tokens", 0),
+                output_tokens=local_data.get("output_tokens", 0),
+                cache_creation=local_data.get("cache_creation_input_tokens", 0),
+                cache_read=local_data.get("cache_read_input_tokens", 0),
+                record_count=local_data.get("record_count", 0),
+                session_count=local_data.get("session_count", 0),
+                # Local billable tokens over the last 7 days
+                weekly_tokens=weekly_data.get("billable_total", 0),
+                sonnet_weekly_tokens=sonnet_weekly_tokens,
+                models=models,
+                projects=projects,
+                activity_rate=activity_rate,
+            )
+        }
+
+    def start_watching(self, on_change: Callable[[], None]) -> bool:
+        """Watch local logs; on_change fires when a log file is written."""
+        return self._log_monitor.start_watching(on_change)
+
+    def stop_watching(self) -> None:
+        self._log_monitor.stop_watching()
+
+    def close(self) -> None:
+        """Stop watching and abandon any fetch still in flight."""
+        self._log_monitor.close()
+
+    def refresh_local(self) -> UsageSnapshot | None:
+        """Recompute only the local log figures, keeping the last web data.
+
+        Returns:
+            The updated snapshot, or None before the first refresh().
+        """
+        last = self._last_result
+        if last is None:
+            return None
+        error_parts: list[str] = []
+        local_fields = self._local_fields(error_parts)
+        if local_fields is None:
+            # Failed: the last local figures stay, marked stale
+            local_fields = {}
+            stale = tuple(
+                name
+                for name in self.SOURCE_DEADLINES
+                if name in last.stale or name == "local"
+            )
+        else:
+            self._source_values["local"] = local_fields
+            stale = tuple(name for name in last.stale if name != "local")
+        result = replace(
+            last,
+            **local_fields,
+            stale=stale,
+            error="; ".join(error_parts) if error_parts else last.error,
+        )
+        self._last_result = result
+        return result
+
+    def _default_values(self, source: str) -> dict[str, Any]:
+        """A source's fields before it has ever returned."""
+        if source == "web":
+            return self._web_values({})
+        if source == "local":
+            return self._local_values({}, {})
+        return {"subscription_type": "", "rate_tier": ""}
+
+    def _submit(self, source: str) -> Future:
+        """Start a source's fetch, or rejoin one that is still running.
+
+        A fetch that finished after its deadline has its result kept as
+        the source's last known values before a new fetch starts, so a
+        source that is always slow still shows its latest reply.
+        """
+        future = self._in_flight.get(source)
+        if future is not None and future.done():
+            del self._in_flight[source]
+            try:
+                late_values = future.result()[0]
+            except Exception:
+                late_values = None
+            if late_values is not None:
+                self._source_values[source] = late_values
+            future = None
+        if future is None:
+            fetch = {
+                "web": self._web_fields,
+                "local": self._local_fields,
+                "credentials": self._credential_fields,
+            }[source]
+
+            def run() -> tuple[dict[str, Any] | None, list[str]]:
+                errors: list[str] = []
+                return fetch(errors), errors
+
+            future = self._in_flight[source] = _run_in_daemon(
+                run, f"refresh-{source}"
+            )
+        return future
+
+    def refresh(
+        self, on_partial: Callable[[UsageSnapshot], None] | None = None
+    ) -> UsageSnapshot:
+        """Fetch fresh data from claude.ai API and local logs.
+
+        The web API, local logs and credential store are read
+        concurrently, so a refresh takes as long as the slowest source.
+        A source that fails or misses its deadline is reported in
+        "error" and keeps its last known values, listed in "stale".
+
+        Args:
+            on_partial: Called on the calling thread as soon as each
+                source returns, with the last snapshot updated by the
+                sources that have returned so far.
+
+        Returns:
+            Snapshot of all monitoring data.
+        """
+        partial = self._last_result or UsageSnapshot()
+        started = time.monotonic()
+        pending = {
+            self._submit(source): source for source in self.SOURCE_DEADLINES
         }
 
+        values: dict[str, dict[str, Any]] = {}
+        errors: dict[str, list[str]] = {}
+        while pending:
+            elapsed = time.monotonic() - started
+            for future, source in list(pending.items()):
+                deadline = self.SOURCE_DEADLINES[source]
+                if deadline <= elapsed:
+                    del pending[future]
+                    label = self.SOURCE_LABELS[source]
+                    errors[source] = [f"{label}: no reply within {deadline:g}s"]
+            if not pending:
+                break
+            done, _ = wait(
+                pending,
+                timeout=min(self.SOURCE_DEADLINES[s] for s in pending.values())
+                - elapsed,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                source = pending.pop(future)
+                del self._in_flight[source]
+                source_values, errors[source] = future.result()
+                if source_values is None:
+                    continue  # Failed: stale, like a missed deadline
+                values[source] = self._source_values[source] = source_values
+                if on_partial is not None:
+                    partial = replace(partial, **values[source])
+                    on_partial(partial)
+
+        fields: dict[str, Any] = {}
+        error_parts: list[str] = []
+        stale: list[str] = []
+        for source in self.SOURCE_DEADLINES:
+            if source not in values:
+                stale.append(source)
+                values[source] = self._source_values.get(
+                    source
+                ) or self._default_values(source)
+            fields.update(values[source])
+            error_parts.extend(errors.get(source, ()))
+
+        result = UsageSnapshot(
+            **fields,
+            error="; ".join(error_parts) if error_parts else None,
+            stale=tuple(stale),
+            last_updated=datetime.now(tz=timezone.utc),
+        )
+
+        if self._last_result is not None:
+            self._previous_session_pct = self._last_result.session.pct
+        self._last_result = result
+        self._save_snapshot(result)
+        return result
+
+    def _save_snapshot(self, result: UsageSnapshot) -> None:
+        """Write the result to disk; a failure only costs the next start."""
+        data = result.to_dict()
+        for key in self.DATETIME_FIELDS:
+            if isinstance(data.get(key), datetime):
+                data[key] = data[key].isoformat()
+        tmp_path = self._snapshot_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self._snapshot_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.SNAPSHOT_VERSION, "result": data}, f)
+            os.replace(tmp_path, self._snapshot_path)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def load_snapshot(self) -> UsageSnapshot | None:
+        """Load the result saved by the last run, with every source stale.
+
+        Meant for startup, before the first refresh(): the UI can show
+        the old figures at once while a refresh runs in the background.
+        The snapshot also stands in for any source that misses its
+        deadline on that first refresh.
+
+        Returns:
+            The saved result, or None if there is no usable snapshot.
+        """
+        try:
+            with open(self._snapshot_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("version") != self.SNAPSHOT_VERSION:
+                return None
+            data = saved["result"]
+            for key in self.DATETIME_FIELDS:
+                if data.get(key) is not None:
+                    data[key] = datetime.fromisoformat(data[key])
+            result = UsageSnapshot.from_dict(data)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+        result = replace(result, stale=tuple(self.SOURCE_DEADLINES))
+        for source in self.SOURCE_DEADLINES:
+            self._source_values[source] = {
+                name: getattr(result, name) for name in self._default_values(source)
+            }
+        self._previous_session_pct = result.session.pct
         self._last_result = result
         return result
 
+    def next_refresh_seconds(
+        self, base: float = 60.0, minimum: float = 20.0, maximum: float = 600.0
+    ) -> float:
+        """How long to wait before the next refresh().
+
+        While logs are being written or the session percentage is
+        climbing, the interval shrinks from base towards a quarter of it
+        as the session limit nears. With no activity it doubles on each
+        refresh, up to a ceiling that falls from maximum towards minimum
+        as the session percentage rises, and that never runs past the
+        session reset. The result is always between minimum and maximum.
+        """
+        result = self._last_result or UsageSnapshot()
+        session_pct = min(result.session.pct or 0, 100)
+        climbing = session_pct > self._previous_session_pct
+        if climbing or result.local.activity_rate:
+            self._idle_refreshes = 0
+            interval = base * (1 - 0.75 * session_pct / 100)
+        else:
+            self._idle_refreshes += 1
+            interval = base * 2 ** min(self._idle_refreshes, 10)
+        ceiling = maximum * (1 - session_pct / 100)
+        resets_at = result.session.resets_at
+        if isinstance(resets_at, datetime) and resets_at.tzinfo is not None:
+            until_reset = (resets_at - datetime.now(tz=timezone.utc)).total_seconds()
+            if until_reset > 0:
+                ceiling = min(ceiling, until_reset)
+        return max(minimum, min(maximum, ceiling, interval))
+
     @property
-    def last_result(self) -> dict[str, Any] | None:
+    def last_result(self) -> UsageSnapshot | None:
         return self._last_result
@@ -1,89 +1,958 @@
 """Local JSONL log parsing for Claude Code usage data."""
 
+import gzip
+import hashlib
+import heapq
+import io
 import json
+import multiprocessing
 import os
-import glob
+import re
+import sys
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Any
+from typing import Any, BinaryIO, Callable, Hashable, Iterable, Iterator
 
-from claude_token_monitor.platform.paths import claude_config_dir
+from claude_token_monitor.monitor.columnar import UsageColumns
+from claude_token_monitor.monitor.log_watcher import InotifyWatcher, create_watcher
+from claude_token_monitor.monitor.rolling import (
+    CACHE_CREATION,
+    FIELD_COUNT,
+    INPUT,
+    OUTPUT,
+    RECORDS,
+    ExpiringKeySet,
+    RollingWindow,
+    add_counters,
+)
+from claude_token_monitor.monitor.tree_walk import CachedTreeWalker
+from claude_token_monitor.monitor.usage_index import UsageIndex
+from claude_token_monitor.platform.paths import claude_config_dir, monitor_cache_dir
+
+# Optional faster JSON backend; both accept bytes and raise ValueError
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _json_loads = json.loads
+    JSON_BACKEND = "json"
+
+# Optional: read .jsonl.zst archives (.jsonl.gz needs only the stdlib)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compressed transcripts; they never change, so each is decoded once
+ARCHIVE_SUFFIXES = (".jsonl.gz", ".jsonl.zst") if zstandard else (".jsonl.gz",)
+LOG_SUFFIXES = (".jsonl", *ARCHIVE_SUFFIXES)
+_ARCHIVE_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard else ()
+)
+
+# Lines that do not contain this cannot carry a usage object
+_USAGE_MARKER = b'"usage"'
+
+# A quoted key followed by a colon can only occur as a real key: inside a
+# JSON string the quotes would be escaped. That lets a byte scan find the
+# few fields we need in a huge line without parsing it.
+_FIELD_KEY = re.compile(
+    rb'"(usage|timestamp|sessionId|model|id|toolUseResult)"\s*:\s*'
+)
+_STRING_VALUE = re.compile(rb'"(?:[^"\\]|\\.)*"')
+_json_decoder = json.JSONDecoder()
+
+
+def _string_at(raw: bytes, pos: int, limit: int = 1024) -> str | None:
+    """Decode the short JSON string value starting at pos, if there is one."""
+    m = _STRING_VALUE.match(raw, pos, pos + limit)
+    if m is None:
+        return None
+    try:
+        return json.loads(m.group(0))
+    except ValueError:
+        return None
+
+
+def _scan_usage_fields(
+    raw: bytes, usage_limit: int = 4096
+) -> dict[str, Any] | None:
+    """Extract the usage fields of a JSONL line without parsing all of it.
+
+    Pulls timestamp, sessionId, message.id, message.model and the usage
+    object out by locating their keys, and returns them in the shape of
+    a parsed entry. Returns None when the scan is ambiguous (a field
+    appears more than once, a subagent result is embedded, or a value is
+    not where it is expected), in which case the caller parses the line.
+    """
+    found: dict[bytes, list[int]] = {}
+    for m in _FIELD_KEY.finditer(raw):
+        found.setdefault(m.group(1), []).append(m.end())
+
+    usage_at = found.get(b"usage", [])
+    if len(usage_at) != 1 or b"toolUseResult" in found:
+        return None
+    start = usage_at[0]
+    try:
+        usage, _end = _json_decoder.raw_decode(
+            raw[start:start + usage_limit].decode("utf-8", errors="replace")
+        )
+    except ValueError:
+        return None
+    if not isinstance(usage, dict):
+        return None
+
+    fields: dict[bytes, str] = {}
+    for key in (b"timestamp", b"sessionId", b"model"):
+        positions = found.get(key, [])
+        if len(positions) > 1:
+            return None
+        if positions:
+            value = _string_at(raw, positions[0])
+            if value is None:
+                return None
+            fields[key] = value
+
+    # Content blocks carry ids of their own; the message id is msg_*
+    message_ids = [
+        value for value in (_string_at(raw, pos) for pos in found.get(b"id", []))
+        if value and value.startswith("msg_")
+    ]
+    if len(message_ids) != 1:
+        return None
+
+    return {
+        "timestamp": fields.get(b"timestamp"),
+        "sessionId": fields.get(b"sessionId"),
+        "message": {
+            "id": message_ids[0],
+            "model": fields.get(b"model"),
+            "usage": usage,
+        },
+    }
+
+
+def _session_name(filepath: str) -> str:
+    """A log's file name without its .jsonl (and compression) suffix."""
+    name = os.path.basename(filepath)
+    for suffix in LOG_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return os.path.splitext(name)[0]
+
+
+def _open_archive(filepath: str) -> BinaryIO:
+    """Open a compressed JSONL file as a stream of decompressed bytes."""
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "rb")
+    raw = open(filepath, "rb")
+    try:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            raw, read_across_frames=True, closefd=True
+        )
+    except BaseException:
+        raw.close()
+        raise
+    return io.BufferedReader(reader)
+
+
+class _Closed(Exception):
+    """Raised inside a pass that close() cut short."""
+
+
+class _FileCheckpoint:
+    """Where the previous pass stopped reading a JSONL file."""
+
+    __slots__ = ("file_id", "dev", "ino", "size", "mtime", "offset")
+
+    def __init__(
+        self,
+        file_id: int | None,
+        dev: int,
+        ino: int,
+        size: int = 0,
+        mtime: float = 0.0,
+        offset: int = 0,
+    ):
+        self.file_id = file_id
+        self.dev = dev
+        self.ino = ino
+        self.size = size
+        self.mtime = mtime
+        self.offset = offset
+
+
+class _IndexedKeySet:
+    """The seen-set, backed by the index for keys older than it remembers.
+
+    The in-memory set only reaches back to since; a record from before
+    that is looked up among the keys recorded in the index.
+    """
+
+    __slots__ = ("keys", "index", "since")
+
+    def __init__(self, keys: ExpiringKeySet, index: UsageIndex, since: float):
+        self.keys = keys
+        self.index = index
+        self.since = since
+
+    def add(self, key: str, ts: float) -> bool:
+        """Remember key at time ts; return False if it was already known."""
+        if not self.keys.add(key, ts):
+            return False
+        return ts >= self.since or not self.index.has_key(key)
 
 
 class LogMonitor:
-    """Parses local Claude Code logs for token usage data."""
+    """Parses local Claude Code logs for token usage data.
+
+    Parsed usage rows are kept in a persistent SQLite index. Files are
+    ingested incrementally: each pass only reads the bytes appended
+    since the previous one, so a restart does not re-parse old history.
+    With start_watching(), a filesystem watcher reports which files
+    changed so a pass does not have to walk the tree. Newly ingested rows
+    also feed a bucketed rolling window, which answers windows up to its
+    span without touching the index.
+
+    Claude Code writes one line per content block of an assistant
+    message, each repeating the message's usage, and a resumed session
+    copies earlier messages into a new file. Records are therefore
+    counted once per message id (or request id), using a seen-set that
+    only remembers keys inside the widest window being queried. Records
+    older than that are checked against the keys kept in the index.
+    """
 
     DEFAULT_WINDOW_HOURS = 5.0
+    INDEX_FILENAME = "usage-index.sqlite3"
+    # Files at least this large are bisected to the window cutoff
+    SEEK_MIN_BYTES = 4 * 1024 * 1024
+    # Bisection stops once the candidate range is this small
+    SEEK_SPAN_BYTES = 64 * 1024
+    # Lines at least this large have their usage fields scanned out
+    # instead of being parsed in full
+    EXTRACT_MIN_BYTES = 256 * 1024
+    # Rolling window kept in memory; windows up to this long are served
+    # from it, rounded to whole buckets
+    RING_SPAN_HOURS = DEFAULT_WINDOW_HOURS
+    RING_BUCKET_SECONDS = 60.0
+    # With a watcher running, the whole tree is still walked this often
+    FULL_RESCAN_SECONDS = 600.0
+    # Files never seen before are parsed in a process pool when they add
+    # up to at least this much; smaller backlogs are not worth the startup
+    PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+    PARALLEL_MAX_WORKERS = 8
+    # Granularity at which remembered message ids expire
+    SEEN_BUCKET_SECONDS = 3600.0
+    # Projects listed in a usage dict, most billable tokens first
+    TOP_PROJECTS = 10
 
-    def __init__(self):
+    def __init__(self, index_path: str | None = None):
         base = claude_config_dir()
         self._projects_dir = os.path.join(base, "projects")
         self._stats_cache = os.path.join(base, "stats-cache.json")
+        self._index_path = index_path or os.path.join(
+            monitor_cache_dir(), self.INDEX_FILENAME
+        )
+        self._walker = CachedTreeWalker(self._projects_dir, LOG_SUFFIXES)
+        self._index: UsageIndex | None = None
+        self._checkpoints: dict[str, _FileCheckpoint] = {}
+        # Files looked at and skipped by the last walk of the whole tree
+        self._files_scanned = 0
+        self._files_skipped = 0
+        self._ring = RollingWindow(
+            self.RING_SPAN_HOURS * 3600, self.RING_BUCKET_SECONDS
+        )
+        # Set whenever indexed rows are removed; the ring is then rebuilt
+        self._ring_stale = True
+        self._seen = ExpiringKeySet(self.SEEN_BUCKET_SECONDS)
+        # Set whenever the index is (re)opened; the seen-set is then reloaded
+        self._seen_stale = True
+        # How far back the seen-set reaches after the last expiry
+        self._seen_since = 0.0
+        # Files forgotten because a message they skipped lost its counted
+        # copy; they are read again from the start
+        self._reread: set[str] = set()
+        self._watcher: InotifyWatcher | None = None
+        self._last_full_scan = 0.0
+        self._lock = threading.Lock()
+        # Set by close(); a pass in progress stops at the next file, and a
+        # process-pool parse through pool_stop, which its workers check
+        self._closing = threading.Event()
+        self._pool_stop = None
 
-    def _parse_jsonl_file(
-        self, filepath: str, cutoff: datetime
-    ) -> list[dict[str, Any]]:
-        """Parse a JSONL file and extract usage records after cutoff time."""
-        records = []
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
+    def start_watching(self, on_change: Callable[[], None] | None = None) -> bool:
+        """Watch the projects tree so each pass only ingests changed files.
 
-                    # Look for entries with usage data
-                    usage = None
-                    timestamp = None
-
-                    # Direct usage field on the entry
-                    if isinstance(entry, dict):
-                        usage = entry.get("usage")
-                        ts_str = entry.get("timestamp") or entry.get("ts")
-                        if ts_str:
-                            timestamp = self._parse_timestamp(ts_str)
-
-                        # Check nested message -> usage
-                        if not usage:
-                            message = entry.get("message")
-                            if isinstance(message, dict):
-                                usage = message.get("usage")
-
-                        # Check result -> usage (for API responses)
-                        if not usage:
-                            result = entry.get("result")
-                            if isinstance(result, dict):
-                                usage = result.get("usage")
-
-                    if not usage or not isinstance(usage, dict):
-                        continue
+        Args:
+            on_change: Called from the watcher thread whenever a log file
+                changes, so the caller can schedule a refresh.
 
-                    # Check if within time window
-                    if timestamp and timestamp < cutoff:
-                        continue
+        Returns:
+            True if a watcher is running; False if none is available here,
+            in which case every pass keeps walking the whole tree.
+        """
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = create_watcher(
+                    self._projects_dir, on_change, LOG_SUFFIXES
+                )
+                self._last_full_scan = 0.0
+            return self._watcher is not None
+
+    def stop_watching(self) -> None:
+        with self._lock:
+            if self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+
+    def close(self) -> None:
+        """Stop watching and cut short any pass in progress.
+
+        Meant for shutdown. The pass rolls back rather than finishing, and
+        process-pool workers stop after their current file, so quitting
+        does not wait for a long first-run parse.
+        """
+        self._closing.set()
+        if self._pool_stop is not None:
+            self._pool_stop.set()
+        self.stop_watching()
 
-                    input_tokens = usage.get("input_tokens", 0) or 0
-                    output_tokens = usage.get("output_tokens", 0) or 0
-                    cache_creation = usage.get("cache_creation_input_tokens", 0) or 0
-                    cache_read = usage.get("cache_read_input_tokens", 0) or 0
-
-                    if input_tokens or output_tokens or cache_creation or cache_read:
-                        records.append(
-                            {
-                                "input_tokens": input_tokens,
-                                "output_tokens": output_tokens,
-                                "cache_creation_input_tokens": cache_creation,
-                                "cache_read_input_tokens": cache_read,
-                                "timestamp": timestamp,
-                                "file": filepath,
-                            }
+    def _check_closing(self) -> None:
+        if self._closing.is_set():
+            raise _Closed()
+
+    def _get_index(self) -> UsageIndex:
+        """Open the usage index on first use and load its checkpoints."""
+        if self._index is None:
+            self._index = UsageIndex(self._index_path)
+            self._seen_stale = True
+            self._checkpoints = {
+                path: _FileCheckpoint(*row)
+                for path, row in self._index.checkpoints().items()
+            }
+        return self._index
+
+    def _forget_rows(
+        self, index: UsageIndex, file_id: int, remove: bool = False
+    ) -> None:
+        """Drop a file's rows (and with remove, its checkpoint) from the index.
+
+        Its message ids leave the seen-set too, so re-reading the file
+        counts them again. Other files that skipped one of those messages
+        as a copy are forgotten as well and queued in _reread, so the
+        message is counted from one of them instead.
+        """
+        holders = index.key_holders(file_id)
+        for key in index.file_keys(file_id):
+            self._seen.discard(key)
+        if remove:
+            index.remove_file(file_id)
+        else:
+            index.clear_file(file_id)
+        self._ring_stale = True
+
+        if holders:
+            paths = {cp.file_id: path for path, cp in self._checkpoints.items()}
+            for holder in holders:
+                path = paths.get(holder)
+                if path is None:
+                    continue
+                del self._checkpoints[path]
+                self._forget_rows(index, holder, remove=True)
+                self._reread.add(path)
+
+    def _ingest_file(
+        self, index: UsageIndex, filepath: str, st: os.stat_result, cutoff: datetime
+    ) -> None:
+        """Bring the index up to date with one file's contents."""
+        cp = self._checkpoints.get(filepath)
+        if cp is not None and (cp.dev, cp.ino) == (st.st_dev, st.st_ino):
+            if st.st_size == cp.size and st.st_mtime == cp.mtime:
+                return  # Unchanged since the last pass
+            if st.st_size < cp.size:
+                # Truncated: start over
+                self._forget_rows(index, cp.file_id)
+                cp.offset = 0
+        elif cp is not None:
+            # Replaced by rotation: start over
+            self._forget_rows(index, cp.file_id)
+            cp = _FileCheckpoint(cp.file_id, st.st_dev, st.st_ino)
+        else:
+            cp = _FileCheckpoint(None, st.st_dev, st.st_ino)
+
+        if cp.offset == 0 and st.st_size >= self.SEEK_MIN_BYTES:
+            cp.offset = self._seek_to_cutoff(filepath, st.st_size, cutoff)
+
+        cp.dev, cp.ino = st.st_dev, st.st_ino
+        cp.size = st.st_size
+        cp.mtime = st.st_mtime
+        self._checkpoints[filepath] = cp
+        if cp.file_id is None:
+            cp.file_id = index.save_checkpoint(
+                filepath, cp.dev, cp.ino, cp.size, cp.mtime, cp.offset
+            )
+
+        # Rows stream straight from the file into the index
+        project = self._project_name(filepath)
+        session = _session_name(filepath)
+        seen = _IndexedKeySet(self._seen, index, self._seen_since)
+        skipped: list[tuple[str, float]] = []
+        index.add_rows(
+            cp.file_id,
+            self._count_rows(
+                self._iter_usage_rows(
+                    filepath, cp, cutoff, project, session, seen, skipped
+                )
+            ),
+        )
+        index.add_keys(cp.file_id, skipped, counted=False)
+        index.save_checkpoint(filepath, cp.dev, cp.ino, cp.size, cp.mtime, cp.offset)
+
+    def _ingest_archive(
+        self, index: UsageIndex, filepath: str, st: os.stat_result, cutoff: datetime
+    ) -> None:
+        """Index a compressed transcript from its cached records.
+
+        Archives are immutable, so their records are decoded once, cached
+        under the SHA-256 of the compressed bytes, and reused when the
+        index is rebuilt or the archive is moved or copied. A cache miss
+        stream-decodes the archive line by line. Records keep their keys
+        in the cache, so messages already counted from another file are
+        skipped like in any other log.
+        """
+        cp = self._checkpoints.get(filepath)
+        if cp is not None:
+            if (cp.dev, cp.ino, cp.size, cp.mtime) == (
+                st.st_dev, st.st_ino, st.st_size, st.st_mtime
+            ):
+                return
+            self._forget_rows(index, cp.file_id)
+
+        try:
+            digest = hashlib.sha256()
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            cached = index.archive_rows(digest.hexdigest())
+            if cached is None:
+                archive_cp = _FileCheckpoint(
+                    None, st.st_dev, st.st_ino, st.st_size, st.st_mtime
+                )
+                with _open_archive(filepath) as stream:
+                    cached = [
+                        (row[0], *row[2:])
+                        for row in self._rows_from_lines(
+                            stream,
+                            archive_cp,
+                            datetime.fromtimestamp(0, tz=timezone.utc),
+                            "",
+                            _session_name(filepath),
+                            ExpiringKeySet(self.SEEN_BUCKET_SECONDS),
                         )
+                    ]
+                index.save_archive(digest.hexdigest(), cached)
+        except _ARCHIVE_ERRORS:
+            return  # Unreadable or corrupt: try again on a later pass
+
+        cp = _FileCheckpoint(
+            cp.file_id if cp is not None else None,
+            st.st_dev, st.st_ino, st.st_size, st.st_mtime, st.st_size,
+        )
+        cp.file_id = index.save_checkpoint(
+            filepath, cp.dev, cp.ino, cp.size, cp.mtime, cp.offset
+        )
+        self._checkpoints[filepath] = cp
+
+        since = cutoff.timestamp()
+        project = self._project_name(filepath)
+        seen = _IndexedKeySet(self._seen, index, self._seen_since)
+        rows = []
+        skipped = []
+        for ts, session, model, *counters, key in cached:
+            if ts < since:
+                continue
+            if key is not None and not seen.add(key, ts):
+                skipped.append((key, ts))
+                continue
+            rows.append((ts, project, session, self._model_name(model), *counters, key))
+        index.add_rows(cp.file_id, self._count_rows(rows))
+        index.add_keys(cp.file_id, skipped, counted=False)
+
+    def _shard_files(
+        self, files: list[tuple[str, os.stat_result]], count: int
+    ) -> list[list[tuple]]:
+        """Split files into count shards of roughly equal total bytes.
+
+        A project's files stay together, so a worker sees every copy of a
+        message that a resumed session duplicated and counts it once.
+        """
+        projects: dict[str, list[tuple]] = {}
+        for filepath, st in files:
+            projects.setdefault(self._project_name(filepath), []).append(
+                (filepath, st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+            )
+        shards: list[list[tuple]] = [[] for _ in range(count)]
+        heap = [(0, i) for i in range(count)]
+        # Largest first, each onto the lightest shard so far
+        for tasks in sorted(
+            projects.values(), key=lambda t: sum(task[3] for task in t), reverse=True
+        ):
+            load, i = heapq.heappop(heap)
+            shards[i].extend(tasks)
+            heapq.heappush(heap, (load + sum(task[3] for task in tasks), i))
+        return [shard for shard in shards if shard]
+
+    def _ingest_parallel(
+        self,
+        index: UsageIndex,
+        files: list[tuple[str, os.stat_result]],
+        cutoff: datetime,
+    ) -> bool:
+        """Parse never-seen files in a process pool and index their rows.
+
+        Workers return one row per record, as _ingest_file writes them,
+        so analytics over the records see each request on its own. Each
+        worker starts from the message ids
+        already in the index from cutoff on, such as those of archives
+        read just before, so a copy of a message counted elsewhere is
+        skipped there as it would be in _ingest_file.
+
+        Returns:
+            True if every file was ingested; False if the pool could not
+            be used, in which case nothing was written.
+        """
+        workers = min(
+            os.cpu_count() or 1, self.PARALLEL_MAX_WORKERS, len(files)
+        )
+        if workers < 2:
+            return False
+        shards = self._shard_files(files, workers)
+        stats = dict(files)
+        known = list(index.keys_since(cutoff.timestamp()))
+        # spawn, not fork: the app runs tkinter and watcher threads
+        context = multiprocessing.get_context("spawn")
+        stop = self._pool_stop = context.Event()
+        if self._closing.is_set():
+            stop.set()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(shards),
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(stop,),
+            ) as pool:
+                futures = [
+                    pool.submit(_parse_files, shard, cutoff.timestamp(), known)
+                    for shard in shards
+                ]
+                results = [future.result() for future in futures]
+        except Exception:
+            return False
+        finally:
+            self._pool_stop = None
+        # Workers cut short by close() return partial results
+        self._check_closing()
+
+        for shard_results in results:
+            for filepath, offset, rows, keys, skipped in shard_results:
+                st = stats[filepath]
+                cp = _FileCheckpoint(
+                    None, st.st_dev, st.st_ino, st.st_size, st.st_mtime, offset
+                )
+                cp.file_id = index.save_checkpoint(
+                    filepath, cp.dev, cp.ino, cp.size, cp.mtime, cp.offset
+                )
+                self._checkpoints[filepath] = cp
+                index.add_rows(cp.file_id, self._count_rows(rows))
+                index.add_keys(cp.file_id, keys)
+                index.add_keys(cp.file_id, skipped, counted=False)
+                for key, ts in keys:
+                    self._seen.add(key, ts)
+        return True
+
+    def _count_rows(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Pass index rows through, adding each to the rolling window."""
+        ring = self._ring
+        for row in rows:
+            groups = (("project", row[1]), ("model", row[3]))
+            ring.add(row[0], row[4:9], groups)
+            yield row
+
+    def _seed_ring(self, index: UsageIndex, now: float) -> None:
+        """Rebuild the rolling window from the index."""
+        ring = self._ring
+        ring.clear()
+        ring.advance(now)
+        for number, project, model, *counters in index.bucket_totals(
+            now - ring.span_seconds, ring.bucket_seconds
+        ):
+            ring.add(
+                number * ring.bucket_seconds,
+                counters,
+                (("project", sys.intern(project)), ("model", sys.intern(model))),
+            )
+        self._ring_stale = False
+
+    def _sync(self, cutoff: datetime) -> UsageIndex:
+        """Ingest new log data so the index is complete from cutoff onwards."""
+        index = self._get_index()
+        now = datetime.now(tz=timezone.utc).timestamp()
+        self._ring.advance(now)
+
+        # The rolling window must always be backed by the index
+        since = min(cutoff.timestamp(), now - self._ring.span_seconds)
+
+        # The index only holds rows from where coverage started; a wider
+        # window has to rebuild it from the start of every file.
+        covered_since = index.covered_since
+        if covered_since is None or since < covered_since:
+            index.reset(since)
+            self._checkpoints.clear()
+            self._reread.clear()
+            self._seen_stale = True
+            self._ring_stale = True
+            covered_since = since
+        horizon = datetime.fromtimestamp(covered_since, tz=timezone.utc)
+
+        # Message ids are only remembered back to since. A wider window
+        # than before loads the older ids from the index first, so the
+        # seen-set never claims to reach further back than it does.
+        if self._seen_stale:
+            self._seen.clear()
+            for key, ts in index.keys_since(since):
+                self._seen.add(key, ts)
+            self._seen_stale = False
+        elif since < self._seen_since:
+            for key, ts in index.keys_since(since):
+                if ts < self._seen_since:
+                    self._seen.add(key, ts)
+        else:
+            self._seen.expire(since)
+        self._seen_since = since
+
+        # With a watcher running, only the files it reported are looked
+        # at; the whole tree is still walked when it asks for a rescan,
+        # after an index reset, and every FULL_RESCAN_SECONDS.
+        changed = None
+        if (
+            self._watcher is not None
+            and not self._ring_stale
+            and now - self._last_full_scan < self.FULL_RESCAN_SECONDS
+        ):
+            changed = self._watcher.drain()
+
+        # Stat every candidate first; a file last written before the index
+        # coverage starts cannot hold a record we need, so it is not opened.
+        if changed is None:
+            if self._watcher is not None:
+                self._watcher.drain()  # The walk covers anything queued
+            found = self._walker.walk()
+            self._last_full_scan = now
+        else:
+            found = []
+            for filepath in sorted(changed):
+                try:
+                    found.append((filepath, os.stat(filepath)))
+                except OSError:
+                    continue
+        candidates = []
+        skipped = 0
+        present = set()
+        for filepath, st in found:
+            present.add(filepath)
+            if st.st_mtime < covered_since:
+                skipped += 1
+                continue
+            candidates.append((filepath, st))
+
+        # Files that have been deleted
+        if changed is None:
+            gone = [path for path in self._checkpoints if path not in present]
+        else:
+            gone = [path for path in changed if path not in present]
+
+        try:
+            # Forget deleted files first. A file that skipped one of their
+            # messages as a copy is forgotten too and read again below,
+            # so the message is counted there.
+            for filepath in gone:
+                cp = self._checkpoints.pop(filepath, None)
+                if cp is not None and cp.file_id is not None:
+                    self._forget_rows(index, cp.file_id, remove=True)
+
+            # Archives hold the oldest copies of messages, so they go
+            # first; they are read from their cache, never in the pool
+            pending = []
+            for filepath, st in candidates:
+                self._check_closing()
+                if filepath.endswith(ARCHIVE_SUFFIXES):
+                    self._ingest_archive(index, filepath, st, horizon)
+                else:
+                    pending.append((filepath, st))
+
+            # A large backlog of unseen files (first run, or a rebuilt
+            # index) is parsed in parallel; known files are read
+            # incrementally here.
+            cold = [f for f in pending if f[0] not in self._checkpoints]
+            if sum(st.st_size for _path, st in cold) >= self.PARALLEL_MIN_BYTES:
+                if self._ingest_parallel(index, cold, horizon):
+                    done = {path for path, _st in cold}
+                    pending = [f for f in pending if f[0] not in done]
+
+            for filepath, st in pending:
+                self._check_closing()
+                self._ingest_file(index, filepath, st, horizon)
+
+            # Files forgotten above (or while truncated files were re-read)
+            # because a message they skipped lost its counted copy
+            while self._reread:
+                self._check_closing()
+                filepath = self._reread.pop()
+                try:
+                    st = os.stat(filepath)
+                except OSError:
+                    continue
+                if filepath.endswith(ARCHIVE_SUFFIXES):
+                    self._ingest_archive(index, filepath, st, horizon)
+                else:
+                    self._ingest_file(index, filepath, st, horizon)
+            index.commit()
+        except BaseException:
+            index.rollback()
+            # Checkpoints, ring and seen-set may be ahead of the rolled
+            # back index; they are reloaded with it
+            index.close()
+            self._index = None
+            self._reread.clear()
+            self._ring_stale = True
+            raise
+        if self._ring_stale:
+            self._seed_ring(index, now)
+        if changed is None:
+            # A watcher pass only sees the changed files; the counts keep
+            # describing the whole tree
+            self._files_scanned = len(candidates)
+            self._files_skipped = skipped
+        return index
+
+    def _line_timestamp_after(
+        self, f, pos: int, end: int
+    ) -> tuple[int, datetime | None]:
+        """Find the first timestamped line starting at or after pos.
+
+        Returns:
+            The byte offset where the line following pos starts, and the
+            timestamp of the first line from there on that carries one
+            (None if none does before end).
+        """
+        if pos > 0:
+            # Resync: discard the rest of the line pos falls inside
+            f.seek(pos - 1)
+            f.readline()
+        else:
+            f.seek(0)
+        start = f.tell()
+        while f.tell() < end:
+            raw = f.readline()
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                entry = _json_loads(raw)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                timestamp = self._parse_timestamp(
+                    entry.get("timestamp") or entry.get("ts")
+                )
+                if timestamp:
+                    return start, timestamp
+        return start, None
+
+    def _seek_to_cutoff(self, filepath: str, size: int, cutoff: datetime) -> int:
+        """Bisect a time-ordered JSONL file for where cutoff starts.
+
+        Returns:
+            The offset of a line start at or before the first line inside
+            the window. Lines before it are all older than cutoff, so the
+            caller can stream from there.
+        """
+        lo, hi = 0, size
+        try:
+            with open(filepath, "rb") as f:
+                while hi - lo > self.SEEK_SPAN_BYTES:
+                    mid = (lo + hi) // 2
+                    _start, timestamp = self._line_timestamp_after(f, mid, hi)
+                    if timestamp is not None and timestamp < cutoff:
+                        lo = mid
+                    else:
+                        hi = mid
+                return self._line_timestamp_after(f, lo, lo)[0]
+        except (OSError, IOError):
+            return 0
+
+    def _iter_usage_rows(
+        self,
+        filepath: str,
+        cp: _FileCheckpoint,
+        cutoff: datetime,
+        project: str,
+        session: str,
+        seen: ExpiringKeySet | _IndexedKeySet | None = None,
+        skipped: list[tuple[str, float]] | None = None,
+    ) -> Iterator[tuple]:
+        """Yield index rows for usage lines after cutoff, starting at cp.offset.
+
+        cp.offset advances past each complete line as it is consumed. A
+        trailing line without a newline is left unread so it can be picked
+        up once the writer finishes it.
+        """
+        try:
+            with open(filepath, "rb") as f:
+                f.seek(cp.offset)
+                yield from self._rows_from_lines(
+                    f,
+                    cp,
+                    cutoff,
+                    project,
+                    session,
+                    seen,
+                    skipped,
+                    partial_tail=True,
+                )
         except (OSError, IOError):
             pass
-        return records
+
+    def _rows_from_lines(
+        self,
+        lines: Iterable[bytes],
+        cp: _FileCheckpoint,
+        cutoff: datetime,
+        project: str,
+        session: str,
+        seen: ExpiringKeySet | _IndexedKeySet | None = None,
+        skipped: list[tuple[str, float]] | None = None,
+        partial_tail: bool = False,
+    ) -> Iterator[tuple]:
+        """Yield index rows for the usage lines after cutoff among raw lines.
+
+        cp.offset advances by each line consumed. With partial_tail, a last
+        line without a newline is treated as still being written and is
+        not consumed. Lines without a timestamp are dated by cp.mtime. With
+        seen, a record whose message id (or request id) is already in it
+        is skipped, and new ids are added. With skipped, the (key, ts) of
+        each message skipped as a copy from elsewhere is appended to it,
+        once per message.
+        """
+        local_keys: set[str] = set()
+        for raw in lines:
+            if partial_tail and not raw.endswith(b"\n"):
+                break
+            cp.offset += len(raw)
+            # Cheap byte scan before any decoding or JSON parsing
+            if _USAGE_MARKER not in raw:
+                continue
+            entry = None
+            if len(raw) >= self.EXTRACT_MIN_BYTES:
+                entry = _scan_usage_fields(raw)
+            if entry is None:
+                try:
+                    entry = _json_loads(raw)
+                except ValueError:
+                    # Possibly invalid UTF-8: retry with replacement
+                    try:
+                        entry = json.loads(raw.decode("utf-8", errors="replace"))
+                    except ValueError:
+                        continue
+            if not isinstance(entry, dict):
+                continue
+
+            # Look for entries with usage data
+            timestamp = None
+            ts_str = entry.get("timestamp") or entry.get("ts")
+            if ts_str:
+                timestamp = self._parse_timestamp(ts_str)
+
+            # Direct usage field on the entry
+            usage = entry.get("usage")
+
+            # Check nested message -> usage
+            message = entry.get("message")
+            if not isinstance(message, dict):
+                message = {}
+            if not usage:
+                usage = message.get("usage")
+
+            # Check result -> usage (for API responses)
+            if not usage:
+                result = entry.get("result")
+                if isinstance(result, dict):
+                    usage = result.get("usage")
+
+            if not usage or not isinstance(usage, dict):
+                continue
+
+            # Check if within time window
+            if timestamp and timestamp < cutoff:
+                continue
+
+            input_tokens = usage.get("input_tokens", 0) or 0
+            output_tokens = usage.get("output_tokens", 0) or 0
+            cache_creation = usage.get("cache_creation_input_tokens", 0) or 0
+            cache_read = usage.get("cache_read_input_tokens", 0) or 0
+
+            if input_tokens or output_tokens or cache_creation or cache_read:
+                ts = timestamp.timestamp() if timestamp else cp.mtime
+                key = message.get("id") or entry.get("requestId")
+                if not isinstance(key, str):
+                    key = None
+                if key and seen is not None and not seen.add(key, ts):
+                    # Another line of a message already counted
+                    if skipped is not None and key not in local_keys:
+                        local_keys.add(key)
+                        skipped.append((key, ts))
+                    continue
+                if key and skipped is not None:
+                    local_keys.add(key)
+                yield (
+                    ts,
+                    project,
+                    entry.get("sessionId") or session,
+                    self._model_name(message.get("model")),
+                    input_tokens,
+                    output_tokens,
+                    cache_creation,
+                    cache_read,
+                    1,
+                    key,
+                )
+
+    def _project_name(self, filepath: str) -> str:
+        """Return the interned project a log file belongs to.
+
+        That is its top-level directory under projects/, so subagent
+        transcripts in nested directories count toward their project.
+        """
+        try:
+            rel = os.path.relpath(filepath, self._projects_dir)
+        except ValueError:  # Another drive on Windows
+            rel = filepath
+        name = rel.split(os.sep, 1)[0]
+        if name in (os.curdir, os.pardir) or name == rel:
+            name = os.path.basename(os.path.dirname(filepath))
+        return sys.intern(name)
+
+    @staticmethod
+    def _model_name(value: Any) -> str:
+        """Return an interned model name, so each name is stored only once.
+
+        Every record of a model then shares one string, both in the rows
+        streaming into the index and as a rolling-window group key.
+        """
+        return sys.intern(value) if isinstance(value, str) else ""
 
     def _parse_timestamp(self, value: Any) -> datetime | None:
         """Parse a timestamp from various formats."""
@@ -112,74 +981,62 @@ class LogMonitor:
         except (OSError, IOError, json.JSONDecodeError):
             return None
 
-    def get_usage(self, window_hours: float | None = None) -> dict[str, Any]:
-        """Get local token usage within the rolling time window.
-
-        Args:
-            window_hours: Number of hours for the rolling window.
-                         Defaults to DEFAULT_WINDOW_HOURS (5).
-
-        Returns:
-            Dict with aggregated usage data.
-        """
-        if window_hours is None:
-            window_hours = self.DEFAULT_WINDOW_HOURS
-
-        now = datetime.now(tz=timezone.utc)
-        cutoff = now - timedelta(hours=window_hours)
-
-        # Find all JSONL files
-        pattern = os.path.join(self._projects_dir, "**", "*.jsonl")
-        jsonl_files = glob.glob(pattern, recursive=True)
+    @staticmethod
+    def _counter_dict(counters: list[int]) -> dict[str, int]:
+        return {
+            "input_tokens": counters[0],
+            "output_tokens": counters[1],
+            "cache_creation_input_tokens": counters[2],
+            "cache_read_input_tokens": counters[3],
+        }
 
-        all_records = []
-        sessions: dict[str, dict[str, int]] = {}
+    def _summarize(
+        self,
+        window_hours: float,
+        cutoff: datetime,
+        now: datetime,
+        groups: dict[Hashable, list[int]],
+    ) -> dict[str, Any]:
+        """Build the usage dict for one window from its grouped counters."""
+        total = groups.get(None) or [0] * FIELD_COUNT
+        total_input, total_output, total_cache_creation, total_cache_read = total[:4]
 
-        for filepath in jsonl_files:
-            # Skip very large files (> 50MB) to avoid slow parsing
-            try:
-                if os.path.getsize(filepath) > 50 * 1024 * 1024:
-                    continue
-            except OSError:
+        project_groups: list[tuple[str, list[int]]] = []
+        models: dict[str, dict[str, int]] = {}
+        for key, counters in groups.items():
+            if key is None:
                 continue
-
-            records = self._parse_jsonl_file(filepath, cutoff)
-            all_records.extend(records)
-
-            if records:
-                session_key = os.path.basename(os.path.dirname(filepath))
-                if session_key not in sessions:
-                    sessions[session_key] = {
-                        "input_tokens": 0,
-                        "output_tokens": 0,
-                        "cache_creation_input_tokens": 0,
-                        "cache_read_input_tokens": 0,
-                    }
-                for r in records:
-                    sessions[session_key]["input_tokens"] += r["input_tokens"]
-                    sessions[session_key]["output_tokens"] += r["output_tokens"]
-                    sessions[session_key]["cache_creation_input_tokens"] += r[
-                        "cache_creation_input_tokens"
-                    ]
-                    sessions[session_key]["cache_read_input_tokens"] += r[
-                        "cache_read_input_tokens"
-                    ]
-
-        total_input = sum(r["input_tokens"] for r in all_records)
-        total_output = sum(r["output_tokens"] for r in all_records)
-        total_cache_creation = sum(
-            r["cache_creation_input_tokens"] for r in all_records
-        )
-        total_cache_read = sum(r["cache_read_input_tokens"] for r in all_records)
-
-        # Read stats cache for supplementary data
-        stats_cache = self._read_stats_cache()
+            kind, name = key
+            if kind == "project":
+                project_groups.append((name, counters))
+            elif kind == "model":
+                models[name] = self._counter_dict(counters)
+                models[name]["billable_total"] = (
+                    counters[INPUT] + counters[CACHE_CREATION] + counters[OUTPUT]
+                )
+                models[name]["record_count"] = counters[RECORDS]
 
         # Billable tokens: uncached input + cache creation count toward limits
         # cache_read does NOT count toward rate limits
         billable_input = total_input + total_cache_creation
         billable_total = billable_input + total_output
 
+        # Only the most expensive projects are returned, however many the
+        # window holds
+        projects = []
+        for name, counters in heapq.nlargest(
+            self.TOP_PROJECTS,
+            project_groups,
+            key=lambda g: g[1][INPUT] + g[1][CACHE_CREATION] + g[1][OUTPUT],
+        ):
+            project = self._counter_dict(counters)
+            project["project"] = name
+            project["billable_total"] = (
+                counters[INPUT] + counters[CACHE_CREATION] + counters[OUTPUT]
+            )
+            project["record_count"] = counters[RECORDS]
+            projects.append(project)
+
         return {
             "input_tokens": total_input,
             "output_tokens": total_output,
@@ -191,17 +1048,214 @@ class LogMonitor:
             "window_hours": window_hours,
             "window_start": cutoff.isoformat(),
             "window_end": now.isoformat(),
-            "session_count": len(sessions),
-            "sessions": sessions,
-            "record_count": len(all_records),
-            "files_scanned": len(jsonl_files),
-            "stats_cache": stats_cache,
+            "session_count": len(project_groups),
+            "project_count": len(project_groups),
+            "projects": projects,
+            "models": models,
+            "record_count": total[RECORDS],
+            "files_scanned": self._files_scanned,
+            "files_skipped": self._files_skipped,
         }
 
+    def get_usage_windows(
+        self, windows_hours: Iterable[float]
+    ) -> dict[float, dict[str, Any]]:
+        """Get local token usage for several rolling windows in one pass.
+
+        Windows that fit in the rolling window are read from it; all the
+        longer ones are summed together in a single query over the index.
+
+        Args:
+            windows_hours: Window lengths in hours, e.g. (5, 24, 168).
+
+        Returns:
+            Dict mapping each window length to the same usage dict that
+            get_usage() returns for it, without the stats cache.
+        """
+        windows = sorted(set(windows_hours))
+        now = datetime.now(tz=timezone.utc)
+        cutoffs = {hours: now - timedelta(hours=hours) for hours in windows}
+        grouped: dict[float, dict[Hashable, list[int]]] = {}
+
+        with self._lock:
+            index = self._sync(min(cutoffs.values()))
+            long_windows = []
+            for hours in windows:
+                if hours * 3600 <= self._ring.span_seconds:
+                    grouped[hours] = self._ring.totals(hours * 3600)
+                else:
+                    long_windows.append(hours)
+                    grouped[hours] = {}
+
+            if long_windows:
+                for project, model, *sums in index.window_totals(
+                    [cutoffs[hours].timestamp() for hours in long_windows]
+                ):
+                    for i, hours in enumerate(long_windows):
+                        counters = sums[i * FIELD_COUNT:(i + 1) * FIELD_COUNT]
+                        if not counters[RECORDS]:
+                            continue
+                        groups = grouped[hours]
+                        for key in (None, ("project", project), ("model", model)):
+                            add_counters(groups, key, counters)
+
+            return {
+                hours: self._summarize(hours, cutoffs[hours], now, grouped[hours])
+                for hours in windows
+            }
+
+    def get_usage_history(
+        self, days: float = 30, period: str = "day"
+    ) -> list[dict[str, Any]]:
+        """Get local usage per hour or per local day over a long range.
+
+        Served from the index's rollup tables, so it reads one row per
+        period, project and model rather than the records themselves.
+        Only the first request reaching further back than before has to
+        parse the older logs.
+
+        Args:
+            days: How many days back to go.
+            period: "hour" or "day".
+
+        Returns:
+            List of dicts, oldest first, one per period with any usage,
+            each with period_start (an aware local datetime), the token
+            counters, billable_total and record_count.
+        """
+        now = datetime.now(tz=timezone.utc)
+        cutoff = now - timedelta(days=days)
+        with self._lock:
+            index = self._sync(cutoff)
+            rows = index.rollup_series(period, cutoff.timestamp()).fetchall()
+
+        history = []
+        for key, *counters in rows:
+            if period == "hour":
+                start = datetime.fromtimestamp(key * 3600, tz=timezone.utc)
+            else:
+                start = datetime.fromisoformat(key)
+            entry = self._counter_dict(counters)
+            entry["period_start"] = start.astimezone()
+            entry["billable_total"] = (
+                counters[INPUT] + counters[CACHE_CREATION] + counters[OUTPUT]
+            )
+            entry["record_count"] = counters[RECORDS]
+            history.append(entry)
+        return history
+
+    def get_usage_columns(self, days: float = 7) -> UsageColumns:
+        """Load the usage records of the last few days into a column store.
+
+        For charts and analytics that need individual records rather than
+        window totals.
+
+        Args:
+            days: How many days back to load.
+
+        Returns:
+            A UsageColumns holding the records, sorted by time.
+        """
+        cutoff = datetime.now(tz=timezone.utc) - timedelta(days=days)
+        columns = UsageColumns()
+        with self._lock:
+            index = self._sync(cutoff)
+            columns.extend(index.rows_since(cutoff.timestamp()))
+        return columns
+
+    def get_activity_rate(self, minutes: float = 10) -> float:
+        """Local records per minute over the last few minutes.
+
+        Read from the rolling window as of the last scan, without
+        touching the logs, so it is cheap enough for every refresh.
+        """
+        with self._lock:
+            self._ring.advance(datetime.now(tz=timezone.utc).timestamp())
+            totals = self._ring.totals(minutes * 60).get(None)
+        return totals[RECORDS] / minutes if totals else 0.0
+
+    def get_usage(self, window_hours: float | None = None) -> dict[str, Any]:
+        """Get local token usage within the rolling time window.
+
+        Args:
+            window_hours: Number of hours for the rolling window.
+                         Defaults to DEFAULT_WINDOW_HOURS (5).
+
+        Returns:
+            Dict with aggregated usage data.
+        """
+        if window_hours is None:
+            window_hours = self.DEFAULT_WINDOW_HOURS
+
+        result = self.get_usage_windows([window_hours])[window_hours]
+
+        # Read stats cache for supplementary data
+        result["stats_cache"] = self._read_stats_cache()
+        return result
+
 
 # Module-level singleton
 _log_monitor = LogMonitor()
 
+# In a process-pool worker: set when the parent wants it to stop early
+_worker_stop = None
+
+
+def _init_worker(stop) -> None:
+    """Process-pool initializer: keep the parent's stop event."""
+    global _worker_stop
+    _worker_stop = stop
+
+
+def _parse_files(
+    tasks: list[tuple],
+    cutoff_ts: float,
+    known: Iterable[tuple[str, float]] = (),
+) -> list[tuple[str, int, list[tuple], list[tuple], list[tuple]]]:
+    """Process-pool worker: parse whole files into index rows.
+
+    Args:
+        tasks: (filepath, dev, ino, size, mtime) for each file to parse.
+        cutoff_ts: Records before this epoch time are skipped.
+        known: (message id, ts) of the messages already counted; their
+            copies are skipped.
+
+    Returns:
+        (filepath, offset, rows, keys, skipped) per file, where offset is
+        where reading stopped, rows are index rows, one per record, keys
+        are the (message id, ts) of the records counted, and skipped
+        those of the messages skipped as copies. A message repeated
+        anywhere in the shard is counted once, and not at all if it is in
+        known. Once the parent's stop event is set, files not yet started
+        are left out.
+    """
+    cutoff = datetime.fromtimestamp(cutoff_ts, tz=timezone.utc)
+    seen = ExpiringKeySet(LogMonitor.SEEN_BUCKET_SECONDS)
+    for key, ts in known:
+        seen.add(key, ts)
+    results = []
+    for filepath, dev, ino, size, mtime in tasks:
+        if _worker_stop is not None and _worker_stop.is_set():
+            break
+        cp = _FileCheckpoint(None, dev, ino, size, mtime)
+        if size >= LogMonitor.SEEK_MIN_BYTES:
+            cp.offset = _log_monitor._seek_to_cutoff(filepath, size, cutoff)
+        skipped: list[tuple[str, float]] = []
+        rows = list(
+            _log_monitor._iter_usage_rows(
+                filepath,
+                cp,
+                cutoff,
+                _log_monitor._project_name(filepath),
+                _session_name(filepath),
+                seen,
+                skipped,
+            )
+        )
+        keys = [(row[9], row[0]) for row in rows if row[9] is not None]
+        results.append((filepath, cp.offset, rows, keys, skipped))
+    return results
+
 
 def get_local_usage(window_hours: float | None = None) -> dict[str, Any]:
     """Get local token usage (module-level convenience function)."""
@@ -0,0 +1,217 @@
+"""Filesystem watching for the Claude Code projects tree.
+
+On Linux the tree is watched with inotify through ctypes, so there is no
+extra dependency. Elsewhere, or when inotify cannot be set up, no watcher
+is created and LogMonitor keeps polling the whole tree.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class LogWatcherError(Exception):
+    """Raised when a watcher cannot be set up."""
+
+
+class InotifyWatcher:
+    """Watches a directory tree with inotify and queues changed JSONL paths.
+
+    A background thread collects events. drain() hands the changed paths
+    to the caller, or None when the queue can no longer be trusted (kernel
+    queue overflow, directories moved or removed) and the caller should
+    rescan the whole tree.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        suffixes: tuple[str, ...] = (".jsonl",),
+        on_change: Callable[[], None] | None = None,
+    ):
+        if not sys.platform.startswith("linux"):
+            raise LogWatcherError("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._libc.inotify_init1.argtypes = [ctypes.c_int]
+            self._libc.inotify_add_watch.argtypes = [
+                ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32,
+            ]
+        except (OSError, AttributeError) as e:
+            raise LogWatcherError(f"inotify unavailable: {e}")
+
+        self._root = root
+        self._suffixes = suffixes
+        self._on_change = on_change
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise LogWatcherError(
+                f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}"
+            )
+
+        self._dirs: dict[int, str] = {}
+        self._pending: set[str] = set()
+        self._rescan = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        try:
+            self._watch_tree(root)
+        except LogWatcherError:
+            os.close(self._fd)
+            raise
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), _WATCH_MASK | IN_ONLYDIR
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise LogWatcherError(f"inotify_add_watch({path}): {os.strerror(errno)}")
+        self._dirs[wd] = path
+
+    def _watch_tree(self, top: str) -> list[str]:
+        """Watch top and every directory below it; return files found."""
+        found = []
+        if not os.path.isdir(top):
+            raise LogWatcherError(f"{top} is not a directory")
+        for dirpath, _dirnames, filenames in os.walk(top):
+            self._add_watch(dirpath)
+            found.extend(
+                os.path.join(dirpath, name)
+                for name in filenames if name.endswith(self._suffixes)
+            )
+        return found
+
+    def start(self) -> None:
+        """Start collecting events in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain(self) -> set[str] | None:
+        """Take the queued paths; None means a full rescan is needed."""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            rescan, self._rescan = self._rescan, False
+        if rescan or not self.active:
+            return None
+        return pending
+
+    def _run(self) -> None:
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        while not self._stop.is_set():
+            if not poller.poll(500):
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+            if self._handle(data) and self._on_change is not None:
+                try:
+                    self._on_change()
+                except Exception:
+                    pass
+
+    def _handle(self, data: bytes) -> bool:
+        """Queue the paths named in a buffer of events; True if any changed."""
+        changed = False
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+            pos += length
+
+            if mask & IN_Q_OVERFLOW:
+                with self._lock:
+                    self._rescan = True
+                changed = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # New directory: watch it and queue what it already holds
+                    try:
+                        found = self._watch_tree(path)
+                    except LogWatcherError:
+                        found = None
+                    with self._lock:
+                        if found is None:
+                            self._rescan = True
+                        else:
+                            self._pending.update(found)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    with self._lock:
+                        self._rescan = True
+                changed = True
+            elif name.endswith(self._suffixes):
+                with self._lock:
+                    self._pending.add(path)
+                changed = True
+        return changed
+
+
+def create_watcher(
+    root: str,
+    on_change: Callable[[], None] | None = None,
+    suffixes: tuple[str, ...] = (".jsonl",),
+) -> InotifyWatcher | None:
+    """Start a watcher for root, or return None if none is available."""
+    try:
+        watcher = InotifyWatcher(root, suffixes, on_change)
+    except LogWatcherError:
+        return None
+    watcher.start()
+    return watcher
@@ -0,0 +1,174 @@
+"""Time-bucketed ring buffer for rolling-window token sums."""
+
+from typing import Hashable, Iterable
+
+# Counter layout shared by every bucket and running total
+INPUT, OUTPUT, CACHE_CREATION, CACHE_READ, RECORDS = range(5)
+FIELD_COUNT = 5
+
+
+def add_counters(
+    groups: dict[Hashable, list[int]], key: Hashable, counters: Iterable[int]
+) -> None:
+    """Add a counter list into groups[key], creating it if needed."""
+    total = groups.get(key)
+    if total is None:
+        total = groups[key] = [0] * FIELD_COUNT
+    for i, value in enumerate(counters):
+        total[i] += value
+
+
+class RollingWindow:
+    """Token counters for a trailing window, kept in fixed-width time buckets.
+
+    Each bucket maps a group key (None for the overall total, or e.g.
+    ("project", name)) to a counter list. Running totals for the full span
+    are maintained as buckets are added and expire, so reading them costs
+    the same however many records the window holds. Window edges are
+    rounded to whole buckets.
+    """
+
+    def __init__(self, span_seconds: float, bucket_seconds: float = 60.0):
+        self._bucket_seconds = bucket_seconds
+        self._size = max(1, int(-(-span_seconds // bucket_seconds)))
+        self._slots: list[dict[Hashable, list[int]] | None] = [None] * self._size
+        self._head: int | None = None
+        self._totals: dict[Hashable, list[int]] = {}
+
+    @property
+    def span_seconds(self) -> float:
+        return self._size * self._bucket_seconds
+
+    @property
+    def bucket_seconds(self) -> float:
+        return self._bucket_seconds
+
+    def clear(self) -> None:
+        self._slots = [None] * self._size
+        self._head = None
+        self._totals = {}
+
+    def _expire(self, slot: int) -> None:
+        bucket = self._slots[slot]
+        if bucket is None:
+            return
+        self._slots[slot] = None
+        for key, counters in bucket.items():
+            total = self._totals[key]
+            for i in range(FIELD_COUNT):
+                total[i] -= counters[i]
+            if not total[RECORDS]:
+                del self._totals[key]
+
+    def advance(self, now: float) -> None:
+        """Move the window's leading edge to now, expiring old buckets."""
+        newest = int(now // self._bucket_seconds)
+        if self._head is None:
+            self._head = newest
+            return
+        if newest <= self._head:
+            return
+        if newest - self._head >= self._size:
+            self.clear()
+        else:
+            for number in range(self._head + 1, newest + 1):
+                self._expire(number % self._size)
+        self._head = newest
+
+    def add(
+        self, ts: float, counters: Iterable[int], groups: Iterable[Hashable] = ()
+    ) -> None:
+        """Count one record (or a pre-summed batch) at time ts.
+
+        counters is (input, output, cache_creation, cache_read, records).
+        Records older than the window are ignored; records from the
+        future are counted in the newest bucket.
+        """
+        if self._head is None:
+            self.advance(ts)
+        number = min(int(ts // self._bucket_seconds), self._head)
+        if number <= self._head - self._size:
+            return
+        slot = number % self._size
+        bucket = self._slots[slot]
+        if bucket is None:
+            bucket = self._slots[slot] = {}
+        counters = tuple(counters)
+        for key in (None, *groups):
+            cell = bucket.get(key)
+            if cell is None:
+                cell = bucket[key] = [0] * FIELD_COUNT
+            total = self._totals.get(key)
+            if total is None:
+                total = self._totals[key] = [0] * FIELD_COUNT
+            for i in range(FIELD_COUNT):
+                cell[i] += counters[i]
+                total[i] += counters[i]
+
+    def totals(self, seconds: float | None = None) -> dict[Hashable, list[int]]:
+        """Return {group: counters} for the trailing seconds (default: span).
+
+        The full span is read from the running totals; a shorter window
+        sums only the buckets it covers.
+        """
+        if seconds is None or seconds >= self.span_seconds:
+            return {key: list(counters) for key, counters in self._totals.items()}
+        if self._head is None:
+            return {}
+        result: dict[Hashable, list[int]] = {}
+        count = max(1, int(-(-seconds // self._bucket_seconds)))
+        for number in range(self._head - count + 1, self._head + 1):
+            bucket = self._slots[number % self._size]
+            if bucket is None:
+                continue
+            for key, counters in bucket.items():
+                add_counters(result, key, counters)
+        return result
+
+
+class ExpiringKeySet:
+    """Keys remembered until their timestamp falls out of the window.
+
+    Keys are grouped by timestamp bucket, so expiring everything older
+    than a time drops whole buckets at once and memory stays bounded by
+    the number of keys inside the window, not by history.
+    """
+
+    def __init__(self, bucket_seconds: float = 3600.0):
+        self._bucket_seconds = bucket_seconds
+        self._buckets: dict[int, set[Hashable]] = {}
+        self._numbers: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._numbers
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._numbers.clear()
+
+    def add(self, key: Hashable, ts: float) -> bool:
+        """Remember key at time ts; return False if it was already known."""
+        if key in self._numbers:
+            return False
+        number = int(ts // self._bucket_seconds)
+        self._numbers[key] = number
+        bucket = self._buckets.get(number)
+        if bucket is None:
+            bucket = self._buckets[number] = set()
+        bucket.add(key)
+        return True
+
+    def discard(self, key: Hashable) -> None:
+        number = self._numbers.pop(key, None)
+        if number is not None:
+            self._buckets[number].discard(key)
+
+    def expire(self, before: float) -> None:
+        """Forget every key whose bucket ends at or before the given time."""
+        limit = int(before // self._bucket_seconds)
+        for number in [n for n in self._buckets if n < limit]:
+            for key in self._buckets.pop(number):
+                del self._numbers[key]
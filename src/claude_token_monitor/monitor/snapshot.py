@@ -0,0 +1,167 @@
+"""Immutable, typed snapshots of the combined monitoring data.
+
+Snapshots are frozen slotted dataclasses. A refresh only builds the
+parts that changed and shares the rest with the previous snapshot, and
+comparing two snapshots compares a few fields rather than walking dicts.
+to_dict() gives the flat dict that refresh() used to return.
+"""
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True, slots=True)
+class WindowUsage:
+    """One claude.ai usage limit: the percentage used and when it resets."""
+
+    pct: float = 0
+    resets_at: datetime | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ModelUsage:
+    """Local billable tokens for one model."""
+
+    name: str
+    session_tokens: int = 0
+    weekly_tokens: int = 0
+    record_count: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class ProjectUsage:
+    """Local tokens for one project in the session window."""
+
+    project: str
+    billable_total: int = 0
+    record_count: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+
+def _known_fields(cls, data: dict[str, Any]) -> dict[str, Any]:
+    """The entries of data that name a field of dataclass cls."""
+    return {f.name: data[f.name] for f in fields(cls) if f.name in data}
+
+
+@dataclass(frozen=True, slots=True)
+class LocalStats:
+    """Figures from the local Claude Code logs.
+
+    Token counts cover the session window, except weekly_tokens and
+    sonnet_weekly_tokens, which cover the last 7 days. models is ordered
+    by weekly tokens, largest first; projects by cost, largest first.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation: int = 0
+    cache_read: int = 0
+    record_count: int = 0
+    session_count: int = 0
+    weekly_tokens: int = 0
+    sonnet_weekly_tokens: int = 0
+    models: tuple[ModelUsage, ...] = ()
+    projects: tuple[ProjectUsage, ...] = ()
+    # Local records per minute, lately
+    activity_rate: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_creation": self.cache_creation,
+            "cache_read": self.cache_read,
+            "record_count": self.record_count,
+            "session_count": self.session_count,
+            "weekly_tokens": self.weekly_tokens,
+            "sonnet_weekly_tokens": self.sonnet_weekly_tokens,
+            "models": {
+                m.name: {
+                    "session_tokens": m.session_tokens,
+                    "weekly_tokens": m.weekly_tokens,
+                    "record_count": m.record_count,
+                }
+                for m in self.models
+            },
+            "projects": [
+                {f.name: getattr(p, f.name) for f in fields(ProjectUsage)}
+                for p in self.projects
+            ],
+            "activity_rate": self.activity_rate,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LocalStats":
+        values = _known_fields(cls, data)
+        values["models"] = tuple(
+            ModelUsage(name, **_known_fields(ModelUsage, m))
+            for name, m in (data.get("models") or {}).items()
+        )
+        values["projects"] = tuple(
+            ProjectUsage(**_known_fields(ProjectUsage, p))
+            for p in data.get("projects") or ()
+        )
+        return cls(**values)
+
+
+@dataclass(frozen=True, slots=True)
+class UsageSnapshot:
+    """Everything the UI shows, as of one refresh.
+
+    stale lists the sources ("web", "local", "credentials") whose fields
+    were carried over from an earlier snapshot rather than fetched.
+    """
+
+    # Real usage from claude.ai
+    session: WindowUsage = WindowUsage()
+    weekly: WindowUsage = WindowUsage()
+    sonnet: WindowUsage = WindowUsage()
+    # Extra usage (if available)
+    extra_spent: float | None = None
+    extra_limit: float | None = None
+    extra_pct: float | None = None
+    # Local log data (supplementary detail)
+    local: LocalStats = LocalStats()
+    # Subscription
+    subscription_type: str = ""
+    rate_tier: str = ""
+    # Metadata
+    error: str | None = None
+    stale: tuple[str, ...] = ()
+    last_updated: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """The flat dict refresh() used to return."""
+        return {
+            "session_pct": self.session.pct,
+            "session_resets_at": self.session.resets_at,
+            "weekly_pct": self.weekly.pct,
+            "weekly_resets_at": self.weekly.resets_at,
+            "sonnet_pct": self.sonnet.pct,
+            "sonnet_resets_at": self.sonnet.resets_at,
+            "extra_spent": self.extra_spent,
+            "extra_limit": self.extra_limit,
+            "extra_pct": self.extra_pct,
+            **self.local.to_dict(),
+            "subscription_type": self.subscription_type,
+            "rate_tier": self.rate_tier,
+            "error": self.error,
+            "stale": list(self.stale),
+            "last_updated": self.last_updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UsageSnapshot":
+        """Build a snapshot from a dict laid out like to_dict()'s."""
+        values = _known_fields(cls, data)
+        for name in ("session", "weekly", "sonnet"):
+            values[name] = WindowUsage(
+                data.get(f"{name}_pct") or 0, data.get(f"{name}_resets_at")
+            )
+        values["local"] = LocalStats.from_dict(data)
+        values["stale"] = tuple(data.get("stale") or ())
+        return cls(**values)
@@ -0,0 +1,110 @@
+"""Directory walking with listings cached by directory mtime."""
+
+import os
+import sys
+import time
+
+# A directory modified this recently may change again within the same
+# mtime tick, so its listing is not trusted on the next walk.
+_RACY_SECONDS = 2.0
+
+# On Windows DirEntry.stat() leaves st_dev and st_ino at 0, and callers
+# compare them to tell a rotated file from an appended one
+_ENTRY_STAT_HAS_INODE = sys.platform != "win32"
+
+
+class _Listing:
+    """One directory's cached entries."""
+
+    __slots__ = ("mtime_ns", "files", "dirs", "trusted")
+
+    def __init__(self, mtime_ns: int, files: list[str], dirs: list[str], trusted: bool):
+        self.mtime_ns = mtime_ns
+        self.files = files
+        self.dirs = dirs
+        self.trusted = trusted
+
+
+class CachedTreeWalker:
+    """Finds files under a root, re-listing only directories that changed.
+
+    Creating, removing or renaming an entry updates its directory's
+    mtime, so a directory whose mtime is unchanged still has the listing
+    seen last time and only needs one stat. Appending to a file does not
+    touch the directory, so matching files are still statted on every
+    walk; the walk returns those stat results so callers need not stat
+    them again.
+
+    Like a recursive glob, names starting with a dot are skipped.
+    """
+
+    def __init__(self, root: str, suffixes: tuple[str, ...] = (".jsonl",)):
+        self._root = root
+        self._suffixes = suffixes
+        self._cache: dict[str, _Listing] = {}
+        self.dirs_listed = 0
+        self.dirs_cached = 0
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _list(self, path: str, mtime_ns: int, now: float) -> tuple[_Listing, list]:
+        """scandir one directory; also return the stats of matching files."""
+        files = []
+        dirs = []
+        stats = []
+        with os.scandir(path) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        dirs.append(name)
+                    elif name.endswith(self._suffixes):
+                        files.append(name)
+                        st = (
+                            entry.stat()
+                            if _ENTRY_STAT_HAS_INODE
+                            else os.stat(entry.path)
+                        )
+                        stats.append((entry.path, st))
+                except OSError:
+                    continue
+        trusted = now - mtime_ns / 1e9 > _RACY_SECONDS
+        return _Listing(mtime_ns, files, dirs, trusted), stats
+
+    def walk(self) -> list[tuple[str, os.stat_result]]:
+        """Return (path, stat) for every matching file under the root."""
+        now = time.time()
+        cache: dict[str, _Listing] = {}
+        found: list[tuple[str, os.stat_result]] = []
+        self.dirs_listed = self.dirs_cached = 0
+        stack = [self._root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            listing = self._cache.get(path)
+            if listing is not None and listing.trusted and listing.mtime_ns == mtime_ns:
+                self.dirs_cached += 1
+                for name in listing.files:
+                    filepath = os.path.join(path, name)
+                    try:
+                        found.append((filepath, os.stat(filepath)))
+                    except OSError:
+                        continue
+            else:
+                try:
+                    listing, stats = self._list(path, mtime_ns, now)
+                except OSError:
+                    continue
+                self.dirs_listed += 1
+                found.extend(stats)
+            cache[path] = listing
+            stack.extend(os.path.join(path, name) for name in listing.dirs)
+        # Directories no longer reachable drop out of the cache
+        self._cache = cache
+        return found
@@ -0,0 +1,530 @@
+"""Persistent SQLite index of usage rows parsed from local JSONL logs."""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+
+# Bump when the schema, or how stored values are derived, changes; an index
+# with another version is rebuilt.
+SCHEMA_VERSION = 9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usage (
+    file_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    project TEXT NOT NULL,
+    session TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_creation_input_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    records INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen_keys (
+    file_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    counted INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    hour INTEGER NOT NULL,
+    project TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_creation_input_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (hour, project, model)
+);
+CREATE TABLE IF NOT EXISTS rollup_day (
+    day TEXT NOT NULL,
+    project TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_creation_input_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    PRIMARY KEY (day, project, model)
+);
+CREATE TABLE IF NOT EXISTS archives (
+    digest TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS archive_rows (
+    digest TEXT NOT NULL,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_creation_input_tokens INTEGER NOT NULL,
+    cache_read_input_tokens INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    key TEXT
+);
+CREATE INDEX IF NOT EXISTS archive_rows_digest ON archive_rows (digest);
+CREATE INDEX IF NOT EXISTS usage_ts ON usage (ts);
+CREATE INDEX IF NOT EXISTS usage_file ON usage (file_id);
+CREATE INDEX IF NOT EXISTS seen_keys_ts ON seen_keys (ts);
+CREATE INDEX IF NOT EXISTS seen_keys_file ON seen_keys (file_id);
+CREATE INDEX IF NOT EXISTS seen_keys_key ON seen_keys (key);
+"""
+
+
+class UsageIndex:
+    """On-disk index of normalized usage rows and per-file read checkpoints.
+
+    Rows are complete from ``covered_since`` (epoch seconds) onwards;
+    anything older was skipped while parsing and is not in the index.
+    A row may stand for a batch of ``records`` records, though LogMonitor
+    writes one row per record, cold-start parse included. The dedupe
+    keys (message ids) of counted records are kept alongside, so the
+    in-memory seen-set can be rebuilt after a restart, together with the
+    keys of records skipped as duplicates, so the files holding another
+    copy of a message can be found when the copy counted goes away.
+
+    Hourly and daily rollups (hours since the epoch, and local calendar
+    days) are kept up to date as rows are added and removed, so long
+    ranges can be charted from a few hundred rows. They can always be
+    rebuilt from the usage rows with rebuild_rollups().
+
+    Compressed archives get a separate cache, keyed by content digest,
+    of their records and dedupe keys. It survives reset(), so an archive
+    is only ever decoded once.
+    """
+
+    _TOKEN_COLUMNS = (
+        "input_tokens, output_tokens, cache_creation_input_tokens, "
+        "cache_read_input_tokens, records"
+    )
+
+    def __init__(self, path: str):
+        self._path = path
+        self._conn = self._connect(path)
+        # Day rollups follow the local timezone; rebuild them if it changed
+        if self._meta("rollup_tz") != self._timezone_tag():
+            self.rebuild_rollups(days_only=True)
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.executescript(
+                "DROP TABLE IF EXISTS meta;"
+                "DROP TABLE IF EXISTS files;"
+                "DROP TABLE IF EXISTS usage;"
+                "DROP TABLE IF EXISTS seen_keys;"
+                "DROP TABLE IF EXISTS rollup_hour;"
+                "DROP TABLE IF EXISTS rollup_day;"
+                "DROP TABLE IF EXISTS archives;"
+                "DROP TABLE IF EXISTS archive_rows;"
+                "DROP TABLE IF EXISTS archive_keys;"
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+        return conn
+
+    @classmethod
+    def _connect(cls, path: str) -> sqlite3.Connection:
+        """Open the index, recreating it if corrupt, or fall back to memory."""
+        if path == ":memory:":
+            return cls._open(path)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return cls._open(path)
+        except sqlite3.DatabaseError:
+            # Corrupt file: throw it away and start over
+            try:
+                os.remove(path)
+                return cls._open(path)
+            except (OSError, sqlite3.Error):
+                pass
+        except OSError:
+            pass
+        return cls._open(":memory:")
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @property
+    def covered_since(self) -> float | None:
+        """Epoch seconds from which the indexed rows are complete."""
+        value = self._meta("covered_since")
+        return float(value) if value is not None else None
+
+    @staticmethod
+    def _timezone_tag() -> str:
+        return f"{time.tzname}/{time.timezone}/{time.altzone}"
+
+    @staticmethod
+    def _day_of(hour: int) -> str:
+        """The local calendar day an hour (since the epoch) starts in."""
+        return datetime.fromtimestamp(hour * 3600).date().isoformat()
+
+    def reset(self, covered_since: float) -> None:
+        """Drop every row and checkpoint, and restart coverage at a new time."""
+        with self._conn:
+            self._conn.execute("DELETE FROM usage")
+            self._conn.execute("DELETE FROM seen_keys")
+            self._conn.execute("DELETE FROM rollup_hour")
+            self._conn.execute("DELETE FROM rollup_day")
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('covered_since', ?)",
+                (repr(covered_since),),
+            )
+
+    def checkpoints(self) -> dict[str, tuple]:
+        """Return {path: (file_id, dev, ino, size, mtime, offset)}."""
+        return {
+            row[0]: row[1:]
+            for row in self._conn.execute(
+                "SELECT path, id, dev, ino, size, mtime, offset FROM files"
+            )
+        }
+
+    def save_checkpoint(
+        self, path: str, dev: int, ino: int, size: int, mtime: float, offset: int
+    ) -> int:
+        """Insert or update a file's checkpoint and return its file id."""
+        self._conn.execute(
+            "INSERT INTO files (path, dev, ino, size, mtime, offset) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET dev = excluded.dev, "
+            "ino = excluded.ino, size = excluded.size, "
+            "mtime = excluded.mtime, offset = excluded.offset",
+            (path, dev, ino, size, mtime, offset),
+        )
+        return self._conn.execute(
+            "SELECT id FROM files WHERE path = ?", (path,)
+        ).fetchone()[0]
+
+    def clear_file(self, file_id: int) -> None:
+        """Remove the rows and keys previously ingested from a file."""
+        removed = self._conn.execute(
+            "SELECT CAST(ts / 3600 AS INTEGER) AS hour, project, model, "
+            "SUM(input_tokens), SUM(output_tokens), "
+            "SUM(cache_creation_input_tokens), SUM(cache_read_input_tokens), "
+            "SUM(records) FROM usage WHERE file_id = ? "
+            "GROUP BY hour, project, model",
+            (file_id,),
+        ).fetchall()
+        self._add_rollups(
+            {
+                (hour, project, model): [-value for value in sums]
+                for hour, project, model, *sums in removed
+            }
+        )
+        self._conn.execute("DELETE FROM usage WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM seen_keys WHERE file_id = ?", (file_id,))
+
+    def remove_file(self, file_id: int) -> None:
+        """Forget a file that no longer exists, along with its rows."""
+        self.clear_file(file_id)
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def add_rows(self, file_id: int, rows: Iterable[tuple]) -> None:
+        """Append usage rows for a file.
+
+        Each row is (ts, project, session, model, input_tokens,
+        output_tokens, cache_creation_input_tokens,
+        cache_read_input_tokens, records, key), where key is the record's
+        dedupe key or None.
+        """
+        keys: list[tuple[str, float]] = []
+        hours: dict[tuple, list[int]] = {}
+
+        def usage_rows() -> Iterator[tuple]:
+            for row in rows:
+                if row[9] is not None:
+                    keys.append((row[9], row[0]))
+                group = (int(row[0] // 3600), row[1], row[3])
+                sums = hours.get(group)
+                if sums is None:
+                    hours[group] = list(row[4:9])
+                else:
+                    for i in range(5):
+                        sums[i] += row[4 + i]
+                yield (file_id, *row[:9])
+
+        self._conn.executemany(
+            "INSERT INTO usage (file_id, ts, project, session, model, "
+            "input_tokens, output_tokens, cache_creation_input_tokens, "
+            "cache_read_input_tokens, records) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            usage_rows(),
+        )
+        self.add_keys(file_id, keys)
+        self._add_rollups(hours)
+
+    def _add_rollups(self, hours: dict[tuple, list[int]]) -> None:
+        """Add {(hour, project, model): counters} into both rollup tables.
+
+        Counters may be negative, for rows being removed; groups that
+        end up with no records are deleted.
+        """
+        if not hours:
+            return
+        days: dict[tuple, list[int]] = {}
+        day_of: dict[int, str] = {}
+        for (hour, project, model), sums in hours.items():
+            day = day_of.get(hour)
+            if day is None:
+                day = day_of[hour] = self._day_of(hour)
+            total = days.setdefault((day, project, model), [0] * 5)
+            for i in range(5):
+                total[i] += sums[i]
+        for table, column, groups in (
+            ("rollup_hour", "hour", hours),
+            ("rollup_day", "day", days),
+        ):
+            self._conn.executemany(
+                f"INSERT INTO {table} ({column}, project, model, "
+                f"{self._TOKEN_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT ({column}, project, model) DO UPDATE SET "
+                "input_tokens = input_tokens + excluded.input_tokens, "
+                "output_tokens = output_tokens + excluded.output_tokens, "
+                "cache_creation_input_tokens = cache_creation_input_tokens"
+                " + excluded.cache_creation_input_tokens, "
+                "cache_read_input_tokens = cache_read_input_tokens"
+                " + excluded.cache_read_input_tokens, "
+                "records = records + excluded.records",
+                ((*key, *sums) for key, sums in groups.items()),
+            )
+            self._conn.execute(f"DELETE FROM {table} WHERE records <= 0")
+
+    def rebuild_rollups(self, days_only: bool = False) -> None:
+        """Recompute the rollups from the usage rows (or days from hours)."""
+        with self._conn:
+            if not days_only:
+                self._conn.execute("DELETE FROM rollup_hour")
+                self._conn.execute(
+                    f"INSERT INTO rollup_hour (hour, project, model, "
+                    f"{self._TOKEN_COLUMNS}) "
+                    "SELECT CAST(ts / 3600 AS INTEGER) AS hour, project, model, "
+                    "SUM(input_tokens), SUM(output_tokens), "
+                    "SUM(cache_creation_input_tokens), "
+                    "SUM(cache_read_input_tokens), SUM(records) "
+                    "FROM usage GROUP BY hour, project, model"
+                )
+            days: dict[tuple, list[int]] = {}
+            for hour, project, model, *sums in self._conn.execute(
+                f"SELECT hour, project, model, {self._TOKEN_COLUMNS} "
+                "FROM rollup_hour"
+            ):
+                total = days.setdefault((self._day_of(hour), project, model), [0] * 5)
+                for i in range(5):
+                    total[i] += sums[i]
+            self._conn.execute("DELETE FROM rollup_day")
+            self._conn.executemany(
+                f"INSERT INTO rollup_day (day, project, model, "
+                f"{self._TOKEN_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ((*key, *sums) for key, sums in days.items()),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('rollup_tz', ?)",
+                (self._timezone_tag(),),
+            )
+
+    def rollup_series(self, period: str, since: float) -> Iterator[tuple[Any, ...]]:
+        """Sum the rollups per hour or per local day, from a time onwards.
+
+        Args:
+            period: "hour" or "day".
+            since: Epoch seconds; the period containing it is included.
+
+        Returns:
+            Cursor yielding (hour or day, input_tokens, output_tokens,
+            cache_creation_input_tokens, cache_read_input_tokens,
+            record_count) tuples in time order, where hour counts hours
+            since the epoch and day is an ISO date.
+        """
+        if period == "hour":
+            table, start = "rollup_hour", int(since // 3600)
+        elif period == "day":
+            table, start = "rollup_day", self._day_of(int(since // 3600))
+        else:
+            raise ValueError(f"unknown rollup period: {period!r}")
+        return self._conn.execute(
+            f"SELECT {period}, SUM(input_tokens), SUM(output_tokens), "
+            f"SUM(cache_creation_input_tokens), SUM(cache_read_input_tokens), "
+            f"SUM(records) FROM {table} WHERE {period} >= ? "
+            f"GROUP BY {period} ORDER BY {period}",
+            (start,),
+        )
+
+    def add_keys(
+        self, file_id: int, keys: Iterable[tuple[str, float]], counted: bool = True
+    ) -> None:
+        """Record the dedupe keys, as (key, ts), of a file's records.
+
+        counted says whether the records were counted, or skipped as
+        copies of records counted from another file.
+        """
+        self._conn.executemany(
+            "INSERT INTO seen_keys (file_id, key, ts, counted) VALUES (?, ?, ?, ?)",
+            ((file_id, key, ts, int(counted)) for key, ts in keys),
+        )
+
+    def file_keys(self, file_id: int) -> list[str]:
+        """Return the dedupe keys of the records counted from a file."""
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT key FROM seen_keys WHERE file_id = ? AND counted",
+                (file_id,),
+            )
+        ]
+
+    def key_holders(self, file_id: int) -> list[int]:
+        """Return the other files that skipped a record this file counted."""
+        return [
+            row[0]
+            for row in self._conn.execute(
+                "SELECT DISTINCT copy.file_id FROM seen_keys AS own "
+                "JOIN seen_keys AS copy ON copy.key = own.key "
+                "WHERE own.file_id = ? AND own.counted AND copy.file_id != ?",
+                (file_id, file_id),
+            )
+        ]
+
+    def has_key(self, key: str) -> bool:
+        """Return True if a record with this dedupe key was ever indexed."""
+        return self._conn.execute(
+            "SELECT 1 FROM seen_keys WHERE key = ? LIMIT 1", (key,)
+        ).fetchone() is not None
+
+    def keys_since(self, since: float) -> Iterator[tuple[str, float]]:
+        """Yield (key, ts) for every recorded key at or after since."""
+        return self._conn.execute(
+            "SELECT key, ts FROM seen_keys WHERE ts >= ?", (since,)
+        )
+
+    def archive_rows(self, digest: str) -> list[tuple] | None:
+        """Return an archive's cached records, or None if not cached.
+
+        Records are (ts, session, model, input_tokens, output_tokens,
+        cache_creation_input_tokens, cache_read_input_tokens, records,
+        key), where key is the record's dedupe key or None.
+        """
+        if self._conn.execute(
+            "SELECT 1 FROM archives WHERE digest = ?", (digest,)
+        ).fetchone() is None:
+            return None
+        return self._conn.execute(
+            "SELECT ts, session, model, input_tokens, output_tokens, "
+            "cache_creation_input_tokens, cache_read_input_tokens, records, key "
+            "FROM archive_rows WHERE digest = ?",
+            (digest,),
+        ).fetchall()
+
+    def save_archive(self, digest: str, rows: list[tuple]) -> None:
+        """Cache an archive's records, laid out as archive_rows()."""
+        self._conn.execute("INSERT OR IGNORE INTO archives VALUES (?)", (digest,))
+        self._conn.executemany(
+            "INSERT INTO archive_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((digest, *row) for row in rows),
+        )
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def window_totals(self, cutoffs: list[float]) -> Iterator[tuple[Any, ...]]:
+        """Sum token counters per project and model for several windows.
+
+        All windows are computed in a single pass over the rows at or
+        after the earliest cutoff.
+
+        Returns:
+            Cursor yielding (project, model, *sums) tuples, where sums
+            holds input_tokens, output_tokens, cache_creation_input_tokens,
+            cache_read_input_tokens and record_count for each cutoff in
+            turn.
+        """
+        columns = []
+        params: list[float] = []
+        for cutoff in cutoffs:
+            for column in (
+                "input_tokens",
+                "output_tokens",
+                "cache_creation_input_tokens",
+                "cache_read_input_tokens",
+                "records",
+            ):
+                columns.append(f"SUM(CASE WHEN ts >= ? THEN {column} ELSE 0 END)")
+                params.append(cutoff)
+        params.append(min(cutoffs))
+        return self._conn.execute(
+            f"SELECT project, model, {', '.join(columns)} FROM usage "
+            "WHERE ts >= ? GROUP BY project, model",
+            params,
+        )
+
+    def rows_since(self, since: float) -> Iterator[tuple[Any, ...]]:
+        """Yield usage rows at or after a time, oldest first.
+
+        Returns:
+            Cursor yielding (ts, project, session, model, input_tokens,
+            output_tokens, cache_creation_input_tokens,
+            cache_read_input_tokens, records) tuples.
+        """
+        return self._conn.execute(
+            "SELECT ts, project, session, model, input_tokens, output_tokens, "
+            "cache_creation_input_tokens, cache_read_input_tokens, records "
+            "FROM usage WHERE ts >= ? ORDER BY ts",
+            (since,),
+        )
+
+    def bucket_totals(
+        self, since: float, bucket_seconds: float
+    ) -> Iterator[tuple[Any, ...]]:
+        """Sum token counters per time bucket, project and model since a time.
+
+        Returns:
+            Cursor yielding (bucket_number, project, model, input_tokens,
+            output_tokens, cache_creation_input_tokens,
+            cache_read_input_tokens, record_count) tuples, where
+            bucket_number is ts // bucket_seconds.
+        """
+        return self._conn.execute(
+            "SELECT CAST(ts / ? AS INTEGER) AS bucket, project, model, "
+            "SUM(input_tokens), SUM(output_tokens), "
+            "SUM(cache_creation_input_tokens), SUM(cache_read_input_tokens), "
+            "SUM(records) FROM usage WHERE ts >= ? GROUP BY bucket, project, model",
+            (bucket_seconds, since),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -30,3 +30,17 @@ def claude_config_dir() -> str:
     """Return the Claude CLI config directory."""
     # Claude CLI uses ~/.claude on all platforms
     return os.path.expanduser("~/.claude")
+
+
+def monitor_cache_dir() -> str:
+    """Return the directory where the monitor keeps its own cache files."""
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/claude-token-monitor")
+    elif sys.platform == "win32":
+        return os.path.join(
+            os.environ.get("LOCALAPPDATA", ""), "claude-token-monitor", "Cache"
+        )
+    else:
+        # Linux: honour XDG_CACHE_HOME
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return os.path.join(base, "claude-token-monitor")
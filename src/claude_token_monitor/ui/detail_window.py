@@ -4,7 +4,12 @@ import tkinter as tk
 from datetime import datetime, timezone
 
 from claude_token_monitor.i18n import T
-from claude_token_monitor.monitor.api_monitor import format_tokens
+from claude_token_monitor.monitor.api_monitor import (
+    format_model_name,
+    format_project_name,
+    format_tokens,
+)
+from claude_token_monitor.monitor.snapshot import LocalStats, UsageSnapshot
 from claude_token_monitor.ui.theme import (
     BG_COLOR,
     ACCENT_COLOR,
@@ -31,9 +36,14 @@ from claude_token_monitor.ui.theme import (
 class DetailWindow:
     """Always-on-top detail window showing Claude usage stats."""
 
+    # Models listed under local stats, largest weekly usage first
+    MAX_MODEL_LINES = 4
+    # Projects listed in the top projects section
+    MAX_PROJECT_LINES = 5
+
     def __init__(self, root: tk.Tk):
         self._root = root
-        self._data = None
+        self._data: UsageSnapshot | None = None
         self._visible = False
         self._countdown_after_id = None
 
@@ -66,6 +76,8 @@ class DetailWindow:
                 req_count=T('no_data'), sess_count=T('no_data')
             )
         )
+        self._models_var = tk.StringVar(value=f"{T('models_label')}: {T('no_data')}")
+        self._projects_var = tk.StringVar(value=T("no_data"))
         self._sub_var = tk.StringVar(value=T("no_data"))
         self._updated_var = tk.StringVar(value=f"{T('last_updated')}: {T('no_data')}")
 
@@ -134,6 +146,17 @@ class DetailWindow:
         tk.Label(
             main, textvariable=self._sessions_var, bg=BG_COLOR, fg=TEXT_COLOR,
             font=(MONO_FONT_FAMILY, FONT_SIZE_NORMAL), anchor="w",
+        ).pack(fill=tk.X, pady=(2, 0))
+        tk.Label(
+            main, textvariable=self._models_var, bg=BG_COLOR, fg=DIM_COLOR,
+            font=(MONO_FONT_FAMILY, FONT_SIZE_SMALL), anchor="w", justify=tk.LEFT,
+        ).pack(fill=tk.X, pady=(2, GAP))
+
+        # --- Top projects section ---
+        self._section_header(main, T("top_projects_header"))
+        tk.Label(
+            main, textvariable=self._projects_var, bg=BG_COLOR, fg=TEXT_COLOR,
+            font=(MONO_FONT_FAMILY, FONT_SIZE_SMALL), anchor="w", justify=tk.LEFT,
         ).pack(fill=tk.X, pady=(2, GAP))
 
         # --- Subscription section ---
@@ -172,20 +195,22 @@ class DetailWindow:
         canvas.coords(fill_id, 0, 0, fill_width, 14)
         canvas.itemconfig(fill_id, fill=color)
 
-    def update_data(self, data: dict):
+    def update_data(self, data: UsageSnapshot):
         """Update all UI elements with new data."""
         if data is None:
             return
+        previous = self._data
         self._data = data
 
-        session_pct = data.get("session_pct") or 0
-        weekly_pct = data.get("weekly_pct") or 0
-        sonnet_pct = data.get("sonnet_pct") or 0
+        session_pct = data.session.pct or 0
+        weekly_pct = data.weekly.pct or 0
+        sonnet_pct = data.sonnet.pct or 0
+        local = data.local
 
         # Session bar
         self._update_bar(self._session_canvas, self._session_fill, session_pct, self._bar_width)
         self._session_pct_var.set(f"{session_pct:.0f}% {T('used_label')}")
-        session_reset = data.get("session_resets_at")
+        session_reset = data.session.resets_at
         if session_reset and isinstance(session_reset, datetime):
             self._update_session_countdown(session_reset)
         else:
@@ -193,8 +218,13 @@ class DetailWindow:
 
         # Weekly bar
         self._update_bar(self._weekly_canvas, self._weekly_fill, weekly_pct, self._bar_width)
-        self._weekly_pct_var.set(f"{weekly_pct:.0f}% {T('used_label')}")
-        weekly_reset = data.get("weekly_resets_at")
+        self._weekly_pct_var.set(
+            f"{weekly_pct:.0f}% {T('used_label')}  \u00b7  "
+            + T('local_weekly_format').format(
+                tokens=format_tokens(local.weekly_tokens)
+            )
+        )
+        weekly_reset = data.weekly.resets_at
         if weekly_reset and isinstance(weekly_reset, datetime):
             self._weekly_reset_var.set(
                 f"{T('reset_label')}: {self._format_reset_day(weekly_reset)}"
@@ -204,8 +234,13 @@ class DetailWindow:
 
         # Sonnet bar
         self._update_bar(self._sonnet_canvas, self._sonnet_fill, sonnet_pct, self._bar_width)
-        self._sonnet_pct_var.set(f"{sonnet_pct:.0f}% {T('used_label')}")
-        sonnet_reset = data.get("sonnet_resets_at")
+        self._sonnet_pct_var.set(
+            f"{sonnet_pct:.0f}% {T('used_label')}  \u00b7  "
+            + T('local_weekly_format').format(
+                tokens=format_tokens(local.sonnet_weekly_tokens)
+            )
+        )
+        sonnet_reset = data.sonnet.resets_at
         if sonnet_reset and isinstance(sonnet_reset, datetime):
             self._sonnet_reset_var.set(
                 f"{T('reset_label')}: {self._format_reset_day(sonnet_reset)}"
@@ -213,46 +248,66 @@ class DetailWindow:
         else:
             self._sonnet_reset_var.set(f"{T('reset_label')}: {T('no_data')}")
 
-        # Local stats
-        inp = data.get("input_tokens", 0)
-        out = data.get("output_tokens", 0)
-        cache_create = data.get("cache_creation", 0)
-        cache_read = data.get("cache_read", 0)
-        record_count = data.get("record_count", 0)
-        session_count = data.get("session_count", 0)
-
-        self._tokens_var.set(
-            f"{T('input_label')}: {format_tokens(inp)} / {T('output_label')}: {format_tokens(out)}"
-        )
-        self._cache_var.set(
-            f"{T('cache_create_label')}: {format_tokens(cache_create)} / "
-            f"{T('cache_read_label')}: {format_tokens(cache_read)}"
-        )
-        self._sessions_var.set(
-            T('requests_sessions_format').format(
-                req_count=record_count, sess_count=session_count
-            )
-        )
+        # Local stats and top projects, unless they are unchanged
+        if previous is None or local != previous.local:
+            self._update_local(local)
 
         # Subscription
-        subscription_type = data.get("subscription_type") or T("no_data")
-        rate_tier = data.get("rate_tier") or T("no_data")
+        subscription_type = data.subscription_type or T("no_data")
+        rate_tier = data.rate_tier or T("no_data")
         tier_label = "Max 5x" if "5x" in rate_tier else rate_tier
         self._sub_var.set(
             T('subscription_format').format(type=subscription_type, tier=tier_label)
         )
 
         # Last updated
-        last_updated = data.get("last_updated")
+        last_updated = data.last_updated
         if last_updated and isinstance(last_updated, datetime):
-            self._updated_var.set(
-                f"{T('last_updated')}: {last_updated.strftime('%H:%M:%S')}"
-            )
+            updated = f"{T('last_updated')}: {last_updated.strftime('%H:%M:%S')}"
+            if data.stale:
+                updated += f" ({T('stale_label')})"
+            self._updated_var.set(updated)
 
         # Restart countdown if visible
         if self._visible:
             self._start_countdown()
 
+    def _update_local(self, local: LocalStats):
+        """Update the local stats and top projects sections."""
+        self._tokens_var.set(
+            f"{T('input_label')}: {format_tokens(local.input_tokens)} / {T('output_label')}: {format_tokens(local.output_tokens)}"
+        )
+        self._cache_var.set(
+            f"{T('cache_create_label')}: {format_tokens(local.cache_creation)} / "
+            f"{T('cache_read_label')}: {format_tokens(local.cache_read)}"
+        )
+        self._sessions_var.set(
+            T('requests_sessions_format').format(
+                req_count=local.record_count, sess_count=local.session_count
+            )
+        )
+        model_lines = [
+            T('model_usage_format').format(
+                model=format_model_name(m.name),
+                weekly=format_tokens(m.weekly_tokens),
+                session=format_tokens(m.session_tokens),
+            )
+            for m in local.models[:self.MAX_MODEL_LINES]
+        ]
+        self._models_var.set(
+            "\n".join(model_lines) or f"{T('models_label')}: {T('no_data')}"
+        )
+
+        # Top projects
+        projects = local.projects[:self.MAX_PROJECT_LINES]
+        self._projects_var.set(
+            "\n".join(
+                f"{format_tokens(p.billable_total):>7}  "
+                f"{format_project_name(p.project)}"
+                for p in projects
+            ) or T("no_data")
+        )
+
     def _update_session_countdown(self, reset_at: datetime):
         """Update the session countdown display text."""
         now = datetime.now(timezone.utc)
@@ -266,7 +321,7 @@ class DetailWindow:
     def _tick_countdown(self):
         """Update session countdown every second."""
         if self._data and self._visible:
-            reset_at = self._data.get("session_resets_at")
+            reset_at = self._data.session.resets_at
             if reset_at and isinstance(reset_at, datetime):
                 self._update_session_countdown(reset_at)
             self._countdown_after_id = self._root.after(1000, self._tick_countdown)
@@ -26,7 +26,7 @@ FONT_SIZE_PCT = 13
 
 # Layout
 PANEL_WIDTH = 340
-PANEL_HEIGHT = 460
+PANEL_HEIGHT = 640
 PAD = 16
 GAP = 8
 
@@ -6,6 +6,8 @@ import pystray
 from PIL import Image, ImageDraw, ImageFont
 
 from claude_token_monitor.i18n import T
+from claude_token_monitor.monitor.api_monitor import format_model_name, format_tokens
+from claude_token_monitor.monitor.snapshot import UsageSnapshot
 from claude_token_monitor.ui.theme import GREEN_THRESHOLD, YELLOW_THRESHOLD
 
 
@@ -19,7 +21,7 @@ class TrayIcon:
         self._on_show_detail = on_show_detail
         self._on_refresh = on_refresh
         self._on_quit = on_quit
-        self._data: dict | None = None
+        self._data: UsageSnapshot | None = None
         self._icon: pystray.Icon | None = None
 
     def _create_icon_image(
@@ -56,10 +58,24 @@ class TrayIcon:
 
     def _build_menu(self) -> pystray.Menu:
         """Build the tray context menu."""
-        data = self._data or {}
-        session_pct = data.get("session_pct", 0) or 0
-        weekly_pct = data.get("weekly_pct", 0) or 0
-        sonnet_pct = data.get("sonnet_pct", 0) or 0
+        data = self._data or UsageSnapshot()
+        session_pct = data.session.pct or 0
+        weekly_pct = data.weekly.pct or 0
+        sonnet_pct = data.sonnet.pct or 0
+        weekly_tokens = format_tokens(data.local.weekly_tokens)
+        sonnet_tokens = format_tokens(data.local.sonnet_weekly_tokens)
+        model_items = [
+            pystray.MenuItem(
+                T("model_usage_format").format(
+                    model=format_model_name(m.name),
+                    weekly=format_tokens(m.weekly_tokens),
+                    session=format_tokens(m.session_tokens),
+                ),
+                None,
+                enabled=False,
+            )
+            for m in data.local.models
+        ]
 
         return pystray.Menu(
             pystray.MenuItem(T("claude_usage"), None, enabled=False),
@@ -70,15 +86,22 @@ class TrayIcon:
                 enabled=False,
             ),
             pystray.MenuItem(
-                f"\U0001f4ca {T('weekly_all_header')}: {weekly_pct:.0f}%",
+                f"\U0001f4ca {T('weekly_all_header')}: {weekly_pct:.0f}%"
+                f" \u00b7 {T('local_weekly_format').format(tokens=weekly_tokens)}",
                 None,
                 enabled=False,
             ),
             pystray.MenuItem(
-                f"\U0001f4ca {T('weekly_sonnet_header')}: {sonnet_pct:.0f}%",
+                f"\U0001f4ca {T('weekly_sonnet_header')}: {sonnet_pct:.0f}%"
+                f" \u00b7 {T('local_weekly_format').format(tokens=sonnet_tokens)}",
                 None,
                 enabled=False,
             ),
+            pystray.MenuItem(
+                f"\U0001f9e0 {T('models_label')}",
+                pystray.Menu(*model_items),
+                enabled=bool(model_items),
+            ),
             pystray.Menu.SEPARATOR,
             pystray.MenuItem(
                 f"\U0001f4ca {T('show_detail')}", self._on_show_detail
@@ -90,11 +113,11 @@ class TrayIcon:
             pystray.MenuItem(T("quit"), self._on_quit),
         )
 
-    def update_data(self, data: dict) -> None:
+    def update_data(self, data: UsageSnapshot) -> None:
         """Update tray with new monitoring data."""
         self._data = data
         if self._icon is not None:
-            session_pct = data.get("session_pct", 0) or 0
+            session_pct = data.session.pct or 0
             # Update icon color
             color = self._icon_color_for_pct(session_pct)
             self._icon.icon = self._create_icon_image(color)
@@ -111,6 +134,9 @@ class TrayIcon:
             title=T("app_title"),
             menu=self._build_menu(),
         )
+        if self._data is not None:
+            # Data (e.g. the startup snapshot) arrived before the icon
+            self.update_data(self._data)
         self._icon.run()
 
     def stop(self) -> None:
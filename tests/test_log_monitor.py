@@ -0,0 +1,91 @@
+"""Tests for LogMonitor's dedupe of messages copied between logs."""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from claude_token_monitor.monitor.log_monitor import LOG_SUFFIXES, LogMonitor
+from claude_token_monitor.monitor.tree_walk import CachedTreeWalker
+
+
+def _line(message_id: str, age: timedelta, output_tokens: int = 10) -> str:
+    timestamp = datetime.now(tz=timezone.utc) - age
+    return json.dumps({
+        "timestamp": timestamp.isoformat(),
+        "sessionId": "s",
+        "message": {
+            "id": message_id,
+            "model": "claude-sonnet-4",
+            "usage": {"input_tokens": 0, "output_tokens": output_tokens},
+        },
+    }) + "\n"
+
+
+def _write_log(path: Path, lines: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    projects = tmp_path / "projects"
+    projects.mkdir()
+    mon = LogMonitor(index_path=str(tmp_path / "index.sqlite3"))
+    mon._projects_dir = str(projects)
+    mon._walker = CachedTreeWalker(str(projects), LOG_SUFFIXES)
+    yield mon
+    if mon._index is not None:
+        mon._index.close()
+
+
+def _history_total(mon: LogMonitor, days: float) -> int:
+    return sum(entry["output_tokens"] for entry in mon.get_usage_history(days))
+
+
+def test_copy_older_than_a_narrower_window_is_counted_once(monitor):
+    project = Path(monitor._projects_dir, "p")
+    _write_log(
+        project / "a.jsonl",
+        [_line("msg_old", timedelta(days=10)), _line("msg_a", timedelta(hours=1))],
+    )
+    assert _history_total(monitor, 30) == 20
+
+    # Expires the seen-set to the last 7 days
+    monitor.get_usage_windows([5, 168])
+
+    # A resumed session copies the 10-day-old message
+    _write_log(
+        project / "b.jsonl",
+        [_line("msg_old", timedelta(days=10)), _line("msg_b", timedelta(minutes=5))],
+    )
+    assert _history_total(monitor, 30) == 30
+
+
+def _write_archive(path: Path, lines: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_copy_of_an_archived_message_is_counted_once(
+    monitor, monkeypatch, parallel
+):
+    if parallel:
+        monkeypatch.setattr(LogMonitor, "PARALLEL_MIN_BYTES", 1)
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    project = Path(monitor._projects_dir, "p")
+    copied = [_line(f"msg_{i}", timedelta(hours=2)) for i in range(10)]
+    _write_archive(project / "old.jsonl.gz", copied)
+    _write_log(
+        project / "resumed.jsonl", [*copied, _line("msg_new", timedelta(hours=1))]
+    )
+    _write_log(
+        Path(monitor._projects_dir, "q", "other.jsonl"),
+        [_line("msg_other", timedelta(hours=1))],
+    )
+    assert monitor.get_usage()["record_count"] == 12